@@ -0,0 +1,53 @@
+"""
+Async login for ASGI deployments (see the TASK_ASYNC_VIEWS setting): the
+password is checked on the hashing pool and awaited, so a burst of logins
+does not hold the event loop or a thread per login.
+"""
+from django.contrib.auth import aauthenticate
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .hashing import PasswordHashingBusy
+from .serializers import LoginSerializer
+from .views import LoginView, busy_payload
+
+
+class AsyncLoginView(View):
+    """LoginView's payloads and errors, with the credentials checked asynchronously"""
+    http_method_names = ['post', 'options']
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Token based, like LoginView
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        return HttpResponse(
+            JSONRenderer().render(data), content_type='application/json', status=status_code, headers=headers
+        )
+
+    async def post(self, request):
+        try:
+            data = Request(request, parsers=[JSONParser(), FormParser(), MultiPartParser()]).data
+        except ParseError as e:
+            return self.render({'detail': e.detail}, status.HTTP_400_BAD_REQUEST)
+
+        serializer = LoginSerializer(data=data, context={'authenticate': False})
+        try:
+            serializer.is_valid(raise_exception=True)
+            user = LoginSerializer.check_user(await aauthenticate(request, **serializer.validated_data))
+        except PasswordHashingBusy as e:
+            data, headers = busy_payload(e)
+            return self.render(data, status.HTTP_503_SERVICE_UNAVAILABLE, headers)
+        except ValidationError as e:
+            return self.render({
+                'error': 'Login failed',
+                'details': serializer.errors or e.detail
+            }, status.HTTP_400_BAD_REQUEST)
+        return self.render(LoginView.login_payload(user))
@@ -0,0 +1,159 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+class UserCache:
+    """
+    Thread-safe LRU of users by token user id, holding at most
+    AUTH_USER_CACHE_SIZE users for AUTH_USER_CACHE_TIMEOUT seconds each.
+
+    Each entry records the user's version in the shared cache (see
+    ``get_user_version``) and is only returned while that version is
+    current, so a save or delete in any process (accounts/signals.py) takes
+    effect everywhere on the next request.
+    """
+
+    def __init__(self):
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, cached_version, expires = entry
+            if cached_version != version or expires <= time.monotonic():
+                del self._users[user_id]
+                return None
+            self._users.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user, version):
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+        max_size = getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024)
+        with self._lock:
+            self._users[user_id] = (user, version, time.monotonic() + timeout)
+            self._users.move_to_end(user_id)
+            while len(self._users) > max_size:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+def cache_key(user_id):
+    # The claim may hold the id as a string or an int depending on how the
+    # token was issued
+    return str(user_id)
+
+
+def _shared_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE_ALIAS', 'default')]
+
+
+def _version_key(user_id):
+    return f'accounts:user-version:{user_id}'
+
+
+def get_user_version(user_id):
+    """Current version of a user in the shared cache"""
+    return _shared_cache().get_or_set(_version_key(user_id), 1, timeout=None)
+
+
+async def aget_user_version(user_id):
+    """Async version of ``get_user_version``"""
+    return await _shared_cache().aget_or_set(_version_key(user_id), 1, timeout=None)
+
+
+def _bump_user_version(user_id):
+    cache = _shared_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        # No version stored yet (or it was evicted); a fresh counter still
+        # differs from any version a cached copy recorded
+        cache.set(_version_key(user_id), 2, timeout=None)
+
+
+def invalidate_user(user_id):
+    """
+    Drop the cached copies of a user in every process. Saves and deletes do
+    this through signals; call it after writes that send none, such as
+    ``QuerySet.update()``.
+    """
+    key = cache_key(user_id)
+    user_cache.invalidate(key)
+    _bump_user_version(key)
+    # Again once the write is visible, in case another request re-cached the
+    # old row in between
+    transaction.on_commit(lambda: _bump_user_version(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token's user through ``user_cache``
+    instead of querying the user table on every request. Each request gets
+    its own copy of the cached user, so changes a view makes to
+    ``request.user`` are not seen by other requests until saved.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        # Read before the user, so a save in between is not cached as current
+        version = get_user_version(cache_key(user_id))
+        user = self.get_cached_user(validated_token, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            self.cache_user(validated_token, user, version)
+        return user
+
+    async def aget_user(self, validated_token):
+        """``get_user`` for async views"""
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        version = await aget_user_version(cache_key(user_id))
+        user = self.get_cached_user(validated_token, version)
+        if user is None:
+            user = await sync_to_async(super().get_user)(validated_token)
+            self.cache_user(validated_token, user, version)
+        return user
+
+    def get_cached_user(self, validated_token, version):
+        user = user_cache.get(cache_key(validated_token[api_settings.USER_ID_CLAIM]), version)
+        if user is None:
+            return None
+
+        # Only active users are cached, but the password check depends on the token
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return copy.copy(user)
+
+    def cache_user(self, validated_token, user, version):
+        user_cache.set(cache_key(validated_token[api_settings.USER_ID_CLAIM]), copy.copy(user), version)
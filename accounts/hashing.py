@@ -0,0 +1,168 @@
+"""
+Password hashing and verification on a bounded pool of worker processes.
+
+PBKDF2 is deliberately slow. Run on the request workers, a burst of logins
+holds every CPU core and the task API traffic served by the same workers
+queues behind it. Here at most PASSWORD_HASH_WORKERS processes hash at
+once, so the remaining cores keep serving other requests. At most
+PASSWORD_HASH_MAX_PENDING jobs may be queued or running. A caller that
+finds no free slot within PASSWORD_HASH_QUEUE_TIMEOUT seconds gets
+PasswordHashingBusy, which the views turn into a 503. With
+PASSWORD_HASH_WORKERS = 0, the default, hashing runs inline as Django
+does.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+
+# Seconds between checks for a free slot by async callers
+SLOT_POLL_INTERVAL = 0.01
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the hashing pool has no free slot within the queue timeout"""
+
+
+def _init_worker(settings_module):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _make_password(password):
+    from django.contrib.auth.hashers import make_password
+    return make_password(password)
+
+
+def _verify_password(password, encoded):
+    from django.contrib.auth.hashers import verify_password
+    return verify_password(password, encoded)
+
+
+class HashingPool:
+    """Process pool with a bounded number of outstanding jobs"""
+
+    def __init__(self):
+        self._executor = None
+        # Shared by every executor, so jobs still running on a discarded
+        # pool count against the limit until they finish
+        self._slots = threading.BoundedSemaphore(getattr(settings, 'PASSWORD_HASH_MAX_PENDING', 32))
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self):
+        return getattr(settings, 'PASSWORD_HASH_WORKERS', 0)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # Forking a threaded server process is unsafe
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(settings.SETTINGS_MODULE,),
+                )
+            return self._executor, self._slots
+
+    def _discard(self, executor):
+        """Drop a broken executor so the next job starts a fresh pool"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _submit(self, executor, slots, fn, args):
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _broken(self, executor, retry):
+        """
+        Handle a worker dying before or during a job: the pool is replaced
+        and the job, which has no side effects, may run once more
+        """
+        self._discard(executor)
+        if not retry:
+            raise PasswordHashingBusy('Password hashing is unavailable, try again shortly')
+
+    def run(self, fn, *args, retry=True):
+        if not self.workers:
+            return fn(*args)
+
+        executor, slots = self._get_executor()
+        if not slots.acquire(timeout=getattr(settings, 'PASSWORD_HASH_QUEUE_TIMEOUT', 5)):
+            raise PasswordHashingBusy('Too many logins in progress, try again shortly')
+        try:
+            return self._submit(executor, slots, fn, args).result()
+        except BrokenProcessPool:
+            self._broken(executor, retry)
+            return self.run(fn, *args, retry=False)
+
+    async def arun(self, fn, *args, retry=True):
+        """``run`` for async callers; waiting for a slot or a result never blocks the loop"""
+        if not self.workers:
+            return await asyncio.to_thread(fn, *args)
+
+        executor, slots = self._get_executor()
+        # Polled on the loop rather than waited for in a thread: a cancelled
+        # caller must not take a slot after it has gone
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + getattr(settings, 'PASSWORD_HASH_QUEUE_TIMEOUT', 5)
+        while not slots.acquire(blocking=False):
+            if loop.time() >= deadline:
+                raise PasswordHashingBusy('Too many logins in progress, try again shortly')
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+        try:
+            return await asyncio.wrap_future(self._submit(executor, slots, fn, args))
+        except BrokenProcessPool:
+            self._broken(executor, retry)
+            return await self.arun(fn, *args, retry=False)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+pool = HashingPool()
+
+
+def hash_password(password):
+    """Encoded hash of ``password``, as ``make_password`` would return it"""
+    return pool.run(_make_password, password)
+
+
+async def ahash_password(password):
+    return await pool.arun(_make_password, password)
+
+
+def check_password(user, password):
+    """
+    Whether ``password`` is the user's, as ``user.check_password`` decides,
+    upgrading the stored hash when the hasher settings have changed
+    """
+    is_correct, must_update = pool.run(_verify_password, password, user.password)
+    if is_correct and must_update:
+        user.password = hash_password(password)
+        user.save(update_fields=['password'])
+    return is_correct
+
+
+async def acheck_password(user, password):
+    is_correct, must_update = await pool.arun(_verify_password, password, user.password)
+    if is_correct and must_update:
+        user.password = await ahash_password(password)
+        await user.asave(update_fields=['password'])
+    return is_correct
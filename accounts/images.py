@@ -0,0 +1,211 @@
+"""
+Profile image storage and thumbnails.
+
+Uploads are stored once under the SHA-256 of their content
+(``profile_images/<digest>.<ext>``), so identical uploads share a file and a
+name never changes content; they can be served with a far-future, immutable
+Cache-Control. Off the request path, on PROFILE_IMAGE_WORKERS background
+threads, each image is decoded, cropped square and re-encoded as WebP (JPEG
+where Pillow lacks WebP) in each of PROFILE_IMAGE_SIZES under
+``profile_images/thumbs/<digest>-<size>.<ext>``. Until its thumbnails exist
+the original is served.
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+
+from .models import UserPreferences
+from .preferences import invalidate_preferences
+
+
+logger = logging.getLogger(__name__)
+
+# Pillow format name -> file extension of the originals accepted
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+
+def thumbnail_sizes():
+    return sorted(getattr(settings, 'PROFILE_IMAGE_SIZES', (64, 128, 256)))
+
+
+def thumbnail_format():
+    """Pillow format and file extension thumbnails are written in"""
+    return ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+
+
+def thumbnail_name(digest, size):
+    return f'profile_images/thumbs/{digest}-{size}.{thumbnail_format()[1]}'
+
+
+def pick_size(requested=None):
+    """The smallest thumbnail at least ``requested`` pixels wide, else the largest"""
+    sizes = thumbnail_sizes()
+    requested = requested or getattr(settings, 'PROFILE_IMAGE_DEFAULT_SIZE', 128)
+    return next((size for size in sizes if size >= requested), sizes[-1])
+
+
+def profile_image_url(preferences, request, size=None):
+    """
+    Absolute URL of the user's profile image, as the thumbnail closest to
+    ``size`` pixels once thumbnails exist
+    """
+    if not preferences or not preferences.profile_image or not request:
+        return None
+    if preferences.thumbnail_hash:
+        url = default_storage.url(thumbnail_name(preferences.thumbnail_hash, pick_size(size)))
+    else:
+        url = preferences.profile_image.url
+    return request.build_absolute_uri(url)
+
+
+def requested_size(request):
+    """``?image_size=`` of the request, if it is a number"""
+    try:
+        return int(request.query_params.get('image_size', ''))
+    except (AttributeError, ValueError):
+        return None
+
+
+def read_image(upload):
+    """
+    The bytes and file extension of an uploaded image. Raises ValueError if
+    it is larger than PROFILE_IMAGE_MAX_BYTES or not a JPG, PNG, GIF or WebP
+    image.
+    """
+    # Checked before reading: large uploads are spooled to disk, not memory
+    max_bytes = getattr(settings, 'PROFILE_IMAGE_MAX_BYTES', 5 * 1024 * 1024)
+    if upload.size > max_bytes:
+        raise ValueError(f'Upload an image of at most {max_bytes / (1024 * 1024):g} MB')
+    data = upload.read()
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+            image_format = image.format
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise ValueError('The file is not a valid image') from e
+    if image_format not in EXTENSIONS:
+        raise ValueError('Upload a JPG, PNG, GIF or WebP image')
+    return data, EXTENSIONS[image_format]
+
+
+def replace_profile_image(preferences, upload):
+    """
+    Store ``upload`` as the user's profile image and queue its thumbnails,
+    releasing the previous image. Raises ValueError if it is not an image.
+    """
+    data, extension = read_image(upload)
+    digest = hashlib.sha256(data).hexdigest()
+    name = f'profile_images/{digest}.{extension}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+
+    previous = preferences.profile_image.name, preferences.thumbnail_hash
+    preferences.profile_image = name
+    # Another user may have uploaded the same image already
+    has_thumbnails = all(default_storage.exists(thumbnail_name(digest, size)) for size in thumbnail_sizes())
+    preferences.thumbnail_hash = digest if has_thumbnails else ''
+    preferences.save()
+    release(*previous)
+    transaction.on_commit(lambda: restore(preferences.user_id, name, digest, data))
+
+
+def restore(user_id, name, digest, data):
+    """
+    After an upload commits, put back any of its files that a release() of
+    the same image deleted in between, having checked for references before
+    the upload was visible
+    """
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    if not all(default_storage.exists(thumbnail_name(digest, size)) for size in thumbnail_sizes()):
+        schedule(user_id, name, digest)
+
+
+def clear_profile_image(preferences):
+    previous = preferences.profile_image.name, preferences.thumbnail_hash
+    preferences.profile_image = None
+    preferences.thumbnail_hash = ''
+    preferences.save()
+    release(*previous)
+
+
+def release(name, digest):
+    """
+    Delete an image and its thumbnails once no user refers to them. The
+    references are checked once the caller's change is committed, so files
+    are never deleted for a change that is rolled back, and uploads of the
+    same image restore() what is deleted under them.
+    """
+    transaction.on_commit(lambda: _delete_unreferenced(name, digest))
+
+
+def _delete_unreferenced(name, digest):
+    if name and not UserPreferences.objects.filter(profile_image=name).exists():
+        default_storage.delete(name)
+    if digest and not UserPreferences.objects.filter(thumbnail_hash=digest).exists():
+        for size in thumbnail_sizes():
+            default_storage.delete(thumbnail_name(digest, size))
+
+
+def build_thumbnails(name, digest):
+    """Write the missing thumbnails of the stored image ``name``"""
+    image_format, _ = thumbnail_format()
+    sizes = [size for size in thumbnail_sizes() if not default_storage.exists(thumbnail_name(digest, size))]
+    if not sizes:
+        return
+
+    with default_storage.open(name) as stored, Image.open(stored) as image:
+        # Lets JPEG decode at a reduced scale instead of full size
+        image.draft('RGB', (sizes[-1], sizes[-1]))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha and image_format == 'WEBP' else 'RGB')
+
+        for size in sizes:
+            thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            thumbnail.save(output, image_format, quality=82)
+            default_storage.save(thumbnail_name(digest, size), ContentFile(output.getvalue()))
+
+
+def process_profile_image(user_id, name, digest):
+    """Build the thumbnails of ``name`` and serve them if it is still the user's image"""
+    build_thumbnails(name, digest)
+    if UserPreferences.objects.filter(user_id=user_id, profile_image=name).update(thumbnail_hash=digest):
+        # update() sends no post_save
+        invalidate_preferences(user_id)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _process_in_background(user_id, name, digest):
+    try:
+        process_profile_image(user_id, name, digest)
+    except Exception:
+        logger.exception('Could not build thumbnails for %s', name)
+    finally:
+        # Worker threads are not request threads; nothing else closes this
+        connection.close()
+
+
+def schedule(user_id, name, digest):
+    """Process the image on a background thread, or inline without PROFILE_IMAGE_WORKERS"""
+    global _executor
+    workers = getattr(settings, 'PROFILE_IMAGE_WORKERS', 1)
+    if not workers:
+        process_profile_image(user_id, name, digest)
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='profile-images')
+    _executor.submit(_process_in_background, user_id, name, digest)
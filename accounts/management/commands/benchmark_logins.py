@@ -0,0 +1,123 @@
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.hashing import pool
+
+
+def percentile(values, fraction):
+    if len(values) < 2:
+        return values[0] if values else 0
+    return statistics.quantiles(values, n=100)[int(fraction * 100) - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput under concurrent load, and the task list "
+        "latency other clients see meanwhile, hashing inline and on the pool"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=64, help="Logins per run")
+        parser.add_argument(
+            "--concurrency", type=int, default=16, help="Logins in flight at once"
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=max(1, getattr(settings, "PASSWORD_HASH_WORKERS", 0)),
+            help="Hashing pool size for the pooled run",
+        )
+
+    def handle(self, *args, **options):
+        password = f"Benchmark-{uuid.uuid4().hex}"
+        # Created with the inline hasher; removed again afterwards
+        user = User.objects.create_user(
+            f"benchmark-{uuid.uuid4().hex[:12]}", password=password
+        )
+        try:
+            idle = self.probe_for(user, seconds=1)
+            self.stdout.write(
+                f"task list while idle: p50 {percentile(idle, 0.5) * 1000:.0f} ms, "
+                f"p95 {percentile(idle, 0.95) * 1000:.0f} ms"
+            )
+            for label, workers in [("inline", 0), ("pool", options["workers"])]:
+                with override_settings(PASSWORD_HASH_WORKERS=workers):
+                    self.report(
+                        label, workers, options, *self.run(user, password, options)
+                    )
+                    pool.shutdown()
+        finally:
+            user.delete()
+
+    def run(self, user, password, options):
+        credentials = {"username": user.username, "password": password}
+        # Starts the pool's processes outside the measurement
+        self.login(credentials)
+
+        stop = threading.Event()
+        probes = []
+        prober = threading.Thread(target=self.probe, args=(user, stop, probes))
+        prober.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            logins = list(
+                executor.map(
+                    lambda _: self.login(credentials), range(options["logins"])
+                )
+            )
+        elapsed = time.perf_counter() - started
+        stop.set()
+        prober.join()
+        return elapsed, logins, probes
+
+    def login(self, credentials):
+        started = time.perf_counter()
+        response = Client(HTTP_HOST="localhost").post(
+            "/api/auth/login/", credentials, content_type="application/json"
+        )
+        return response.status_code, time.perf_counter() - started
+
+    def probe(self, user, stop, latencies):
+        """Fetch the task list, as other clients would, until ``stop`` is set"""
+        client = Client(
+            HTTP_HOST="localhost",
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+        )
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get("/api/tasks/")
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.02)
+
+    def probe_for(self, user, seconds):
+        stop = threading.Event()
+        latencies = []
+        timer = threading.Timer(seconds, stop.set)
+        timer.start()
+        self.probe(user, stop, latencies)
+        return latencies
+
+    def report(self, label, workers, options, elapsed, logins, probes):
+        statuses = Counter(status for status, _ in logins)
+        times = [seconds for status, seconds in logins if status == 200]
+        self.stdout.write(
+            f"{label} (workers={workers}, concurrency={options['concurrency']}): "
+            f"{statuses[200] / elapsed:.1f} logins/s, "
+            f"login p50 {percentile(times, 0.5) * 1000:.0f} ms, "
+            f"p95 {percentile(times, 0.95) * 1000:.0f} ms; "
+            f"task list p50 {percentile(probes, 0.5) * 1000:.0f} ms, "
+            f"p95 {percentile(probes, 0.95) * 1000:.0f} ms"
+        )
+        failed = {status: count for status, count in statuses.items() if status != 200}
+        if failed:
+            self.stdout.write(self.style.WARNING(f"  non-200 logins: {failed}"))
@@ -0,0 +1,29 @@
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from accounts.images import process_profile_image
+from accounts.models import UserPreferences
+
+
+class Command(BaseCommand):
+    help = "Build missing profile image thumbnails, e.g. for images uploaded before they existed"
+
+    def handle(self, *args, **options):
+        pending = (
+            UserPreferences.objects.exclude(profile_image="")
+            .exclude(profile_image__isnull=True)
+            .filter(thumbnail_hash="")
+        )
+        built = 0
+        for preferences in pending.iterator():
+            name = preferences.profile_image.name
+            if not default_storage.exists(name):
+                self.stderr.write(f"Missing file {name} for user {preferences.user_id}")
+                continue
+            with default_storage.open(name) as stored:
+                digest = hashlib.sha256(stored.read()).hexdigest()
+            process_profile_image(preferences.user_id, name, digest)
+            built += 1
+        self.stdout.write(self.style.SUCCESS(f"Built thumbnails for {built} images"))
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:40
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# auth.User belongs to another app, so its indexes are created here through
+# the schema editor rather than declared on the model. They back the
+# case-insensitive uniqueness check in RegisterSerializer and enforce it for
+# concurrent registrations. Users without an email are exempt.
+
+
+def _constraints():
+    return [
+        models.UniqueConstraint(
+            Lower("username"), name="auth_user_username_lower_uniq"
+        ),
+        models.UniqueConstraint(
+            Lower("email"),
+            condition=~models.Q(email=""),
+            name="auth_user_email_lower_uniq",
+        ),
+    ]
+
+
+def _case_duplicates(user, field):
+    """Users whose ``field`` matches another user's ignoring case, by lowercased value"""
+    clashes = (
+        user.objects.exclude(**{field: ""})
+        .values(lowered=Lower(field))
+        .annotate(users=models.Count("pk"))
+        .filter(users__gt=1)
+        .values_list("lowered", flat=True)
+    )
+    duplicates = {}
+    for pk, username, value in (
+        user.objects.alias(lowered=Lower(field))
+        .filter(lowered__in=list(clashes))
+        .order_by(Lower(field), "pk")
+        .values_list("pk", "username", field)
+    ):
+        duplicates.setdefault(value.lower(), []).append(f"{username} (id {pk})")
+    return duplicates
+
+
+def add_constraints(apps, schema_editor):
+    user = apps.get_model("auth", "User")
+    # Users created through createsuperuser or the admin skipped the
+    # registration check; the indexes cannot be built over their duplicates
+    problems = [
+        f"{field} {value!r}: {', '.join(users)}"
+        for field in ("username", "email")
+        for value, users in _case_duplicates(user, field).items()
+    ]
+    if problems:
+        raise RuntimeError(
+            "Usernames and emails must be unique ignoring case. Rename or "
+            "remove these users, then migrate again:\n  " + "\n  ".join(problems)
+        )
+    for constraint in _constraints():
+        schema_editor.add_constraint(user, constraint)
+
+
+def remove_constraints(apps, schema_editor):
+    user = apps.get_model("auth", "User")
+    for constraint in _constraints():
+        schema_editor.remove_constraint(user, constraint)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_remove_userpreferences_daily_summary_and_more"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_constraints, remove_constraints),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_user_lower_username_email_uniq"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userpreferences",
+            name="thumbnail_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:10
+
+from django.db import migrations
+
+# Preferences are now created along with each user and no longer on first
+# read, so users created before then without a row get one here.
+
+
+def create_missing_preferences(apps, schema_editor):
+    user = apps.get_model("auth", "User")
+    preferences = apps.get_model("accounts", "UserPreferences")
+    missing = user.objects.filter(preferences__isnull=True).values_list("pk", flat=True)
+    preferences.objects.bulk_create(
+        [preferences(user_id=pk) for pk in missing.iterator()], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_userpreferences_thumbnail_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_preferences, migrations.RunPython.noop),
+    ]
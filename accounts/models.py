@@ -7,6 +7,8 @@ class UserPreferences(models.Model):
     
     # Profile image
     profile_image = models.ImageField(upload_to='profile_images/', null=True, blank=True)
+    # Content hash naming the image's thumbnails once they exist (accounts/images.py)
+    thumbnail_hash = models.CharField(max_length=64, blank=True, default='')
     
     # Appearance settings
     dark_mode = models.BooleanField(default=False)
@@ -0,0 +1,59 @@
+"""
+Per-user cache of UserPreferences.
+
+Every page of the UI loads the profile and preferences, so each user's row
+can be kept in the cache named by PREFERENCES_CACHE_ALIAS, under
+``accounts:preferences:<user id>``, for PREFERENCES_CACHE_TIMEOUT seconds.
+It is dropped whenever it is saved or deleted (accounts/signals.py), which
+only reaches every process when that cache is shared, so there is no
+caching unless the alias is set. Rows are created along with their user, so
+reading them never writes.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import UserPreferences
+
+
+def _cache():
+    alias = getattr(settings, 'PREFERENCES_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def _key(user_id):
+    return f'accounts:preferences:{user_id}'
+
+
+def get_preferences(user):
+    """
+    The user's preferences: the ones already loaded on ``user`` (e.g. with
+    select_related), else the cached or stored row. Users without a row get
+    unsaved defaults, which the first update stores.
+    """
+    relation = user._meta.get_field('preferences')
+    preferences = relation.get_cached_value(user) if relation.is_cached(user) else None
+    if preferences is not None:
+        return preferences
+
+    cache, key = _cache(), _key(user.pk)
+    preferences = cache.get(key) if cache is not None else None
+    if preferences is None:
+        preferences = UserPreferences.objects.filter(user_id=user.pk).first()
+        if preferences is None:
+            preferences = UserPreferences(user_id=user.pk)
+        elif cache is not None:
+            cache.set(key, preferences, getattr(settings, 'PREFERENCES_CACHE_TIMEOUT', 60))
+    # Later lookups in the same request, e.g. by the profile serializer, reuse it
+    user.preferences = preferences
+    return preferences
+
+
+def invalidate_preferences(user_id):
+    cache, key = _cache(), _key(user_id)
+    if cache is None:
+        return
+    cache.delete(key)
+    # Again once the write is visible, in case another request re-cached the
+    # old row in between
+    transaction.on_commit(lambda: cache.delete(key))
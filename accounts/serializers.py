@@ -2,7 +2,12 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
 from django.core.validators import EmailValidator
+from django.db.models import BooleanField, ExpressionWrapper, Q, Value
+from django.db.models.functions import Lower
+from .hashing import hash_password
+from .images import profile_image_url, replace_profile_image, requested_size
 from .models import UserPreferences
+from .preferences import get_preferences
 import re
 
 
@@ -51,7 +56,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def validate_username(self, value):
         """
-        Validate username format and uniqueness
+        Validate username format; uniqueness is checked in validate()
         """
         # Check if username is empty or only whitespace
         if not value or not value.strip():
@@ -70,23 +75,15 @@ class RegisterSerializer(serializers.ModelSerializer):
                 "Username can only contain letters, numbers, and @/./+/-/_ characters."
             )
         
-        # Check if username already exists (case-insensitive)
-        if User.objects.filter(username__iexact=value).exists():
-            raise serializers.ValidationError("A user with this username already exists.")
-        
         return value.strip()
 
     def validate_email(self, value):
         """
-        Validate email format and uniqueness
+        Validate email format; uniqueness is checked in validate()
         """
         if not value or not value.strip():
             raise serializers.ValidationError("Email address is required.")
         
-        # Check if email already exists (case-insensitive)
-        if User.objects.filter(email__iexact=value).exists():
-            raise serializers.ValidationError("A user with this email address already exists.")
-        
         # Additional email format validation
         email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
         if not re.match(email_regex, value):
@@ -154,19 +151,56 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         """
-        Validate password confirmation match
+        Validate password confirmation match and that the username and email
+        are not taken
         """
         if attrs['password'] != attrs['password2']:
             raise serializers.ValidationError({
                 "password2": "Password confirmation does not match. Please ensure both passwords are identical."
             })
+        
+        errors = {}
+        username_taken, email_taken = self.find_taken(attrs['username'], attrs['email'])
+        if username_taken:
+            errors['username'] = ["A user with this username already exists."]
+        if email_taken:
+            errors['email'] = ["A user with this email address already exists."]
+        if errors:
+            raise serializers.ValidationError(errors)
         return attrs
 
+    @staticmethod
+    def find_taken(username, email):
+        """
+        Whether the username and the email are in use, ignoring case, with one
+        query on the Lower() unique indexes from accounts migration 0005
+        """
+        username_match = Q(username_lower=Lower(Value(username)))
+        # The email index leaves out blank emails; repeating its condition lets it be used
+        email_match = Q(email_lower=Lower(Value(email))) & ~Q(email='')
+        rows = (
+            User.objects
+            .alias(username_lower=Lower('username'), email_lower=Lower('email'))
+            .filter(username_match | email_match)
+            .annotate(
+                username_taken=ExpressionWrapper(username_match, output_field=BooleanField()),
+                email_taken=ExpressionWrapper(email_match, output_field=BooleanField()),
+            )
+            .values_list('username_taken', 'email_taken')[:2]
+        )
+        rows = list(rows)
+        return any(row[0] for row in rows), any(row[1] for row in rows)
+
     def create(self, validated_data):
         validated_data.pop('password2')
-        user = User.objects.create_user(**validated_data)
-        # Create default preferences for new user
-        UserPreferences.objects.create(user=user)
+        password = validated_data.pop('password')
+        # As create_user, but hashing on the pool
+        user = User(**validated_data)
+        user.username = User.normalize_username(user.username)
+        user.email = User.objects.normalize_email(user.email)
+        user.password = hash_password(password)
+        # Default preferences are created along with the user (accounts/signals.py)
+        user.save()
         return user
 
 
@@ -212,7 +246,9 @@ class LoginSerializer(serializers.Serializer):
 
     def validate(self, attrs):
         """
-        Validate user credentials
+        Validate user credentials. With ``authenticate: False`` in the context
+        only the fields are validated and the caller checks the credentials
+        (see AsyncLoginView).
         """
         from django.contrib.auth import authenticate
         
@@ -220,25 +256,31 @@ class LoginSerializer(serializers.Serializer):
         password = attrs.get('password')
         
         if username and password:
-            user = authenticate(username=username, password=password)
-            
-            if not user:
-                raise serializers.ValidationError({
-                    "non_field_errors": ["Invalid username or password. Please check your credentials and try again."]
-                })
-            
-            if not user.is_active:
-                raise serializers.ValidationError({
-                    "non_field_errors": ["This account has been deactivated. Please contact support."]
-                })
-            
-            attrs['user'] = user
+            if self.context.get('authenticate', True):
+                attrs['user'] = self.check_user(authenticate(username=username, password=password))
             return attrs
         else:
             raise serializers.ValidationError({
                 "non_field_errors": ["Both username and password are required."]
             })
 
+    @staticmethod
+    def check_user(user):
+        """
+        The user ``authenticate()`` returned, or the validation error to report
+        """
+        if not user:
+            raise serializers.ValidationError({
+                "non_field_errors": ["Invalid username or password. Please check your credentials and try again."]
+            })
+        
+        if not user.is_active:
+            raise serializers.ValidationError({
+                "non_field_errors": ["This account has been deactivated. Please contact support."]
+            })
+        
+        return user
+
 
 class UserSerializer(serializers.ModelSerializer):
     profile_image = serializers.SerializerMethodField()
@@ -248,11 +290,9 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'profile_image')
     
     def get_profile_image(self, obj):
-        if hasattr(obj, 'preferences') and obj.preferences.profile_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.preferences.profile_image.url)
-        return None
+        """Thumbnail for ?image_size= (PROFILE_IMAGE_DEFAULT_SIZE by default)"""
+        request = self.context.get('request')
+        return profile_image_url(get_preferences(obj), request, requested_size(request))
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -262,13 +302,24 @@ class UserProfileSerializer(serializers.ModelSerializer):
         model = User
         fields = ('id', 'username', 'email', 'first_name', 'last_name', 'profile_image')
         read_only_fields = ('id', 'username', 'profile_image')
+
+    def validate_email(self, value):
+        """
+        Emails are unique ignoring case, as enforced by the index from
+        accounts migration 0005
+        """
+        if value:
+            taken = User.objects.alias(email_lower=Lower('email')).filter(email_lower=Lower(Value(value)))
+            if self.instance is not None:
+                taken = taken.exclude(pk=self.instance.pk)
+            if taken.exists():
+                raise serializers.ValidationError("A user with this email address already exists.")
+        return value
     
     def get_profile_image(self, obj):
-        if hasattr(obj, 'preferences') and obj.preferences.profile_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.preferences.profile_image.url)
-        return None
+        """Thumbnail for ?image_size= (PROFILE_IMAGE_DEFAULT_SIZE by default)"""
+        request = self.context.get('request')
+        return profile_image_url(get_preferences(obj), request, requested_size(request))
 
 
 class UserPreferencesSerializer(serializers.ModelSerializer):
@@ -282,9 +333,15 @@ class UserPreferencesSerializer(serializers.ModelSerializer):
         }
     
     def get_profile_image_url(self, obj):
-        if obj.profile_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.profile_image.url)
-        return None
+        request = self.context.get('request')
+        return profile_image_url(obj, request, requested_size(request))
+
+    def update(self, instance, validated_data):
+        upload = validated_data.pop('profile_image', None)
+        if upload:
+            try:
+                replace_profile_image(instance, upload)
+            except ValueError as e:
+                raise serializers.ValidationError({'profile_image': [str(e)]})
+        return super().update(instance, validated_data)
 
@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import invalidate_user
+from .models import UserPreferences
+from .preferences import invalidate_preferences
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Password changes, deactivation and deletion take effect on the next request"""
+    invalidate_user(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+@receiver(post_save, sender=User)
+def create_preferences(sender, instance, created, raw=False, **kwargs):
+    """Every user has preferences from the start, however it was created"""
+    if created and not raw:
+        UserPreferences.objects.create(user=instance)
+
+
+@receiver(post_save, sender=UserPreferences)
+@receiver(post_delete, sender=UserPreferences)
+def invalidate_cached_preferences(sender, instance, **kwargs):
+    invalidate_preferences(instance.user_id)
@@ -1,3 +1,373 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tasks.models import Task
+from .async_views import AsyncLoginView
+from .authentication import UserCache, invalidate_user, user_cache
+from .hashing import HashingPool, PasswordHashingBusy, hash_password
+from .images import thumbnail_name
+from .models import UserPreferences
+from .serializers import RegisterSerializer
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret123')
+        self.task = Task.objects.create(user=self.user, title='Mine')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def user_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in ctx.captured_queries if '"auth_user"' in query['sql']]
+
+    def test_repeat_requests_do_not_query_users(self):
+        url = f'/api/tasks/{self.task.pk}/'
+        self.assertEqual(len(self.user_queries(url)), 1)
+        # Neither authentication nor the IsOwner check loads the user again
+        self.assertEqual(self.user_queries(url), [])
+
+    def test_user_changes_take_effect_immediately(self):
+        self.client.get('/api/tasks/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.client.get('/api/tasks/')
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+    def test_changes_made_elsewhere_take_effect(self):
+        self.client.get('/api/tasks/')
+        # As another process would: only the shared version is bumped
+        with mock.patch.object(user_cache, 'invalidate'):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+    def test_updates_without_signals_need_invalidate_user(self):
+        self.client.get('/api/tasks/')
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        invalidate_user(self.user.pk)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 401)
+
+    def test_profile_edit_keeps_changes_made_elsewhere(self):
+        self.client.get('/api/tasks/')
+        # As another process would: the cached user here is not invalidated
+        User.objects.filter(pk=self.user.pk).update(password=make_password('changed123'))
+        response = self.client.patch('/api/auth/profile/', {'first_name': 'Alice'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Alice')
+        self.assertTrue(self.user.check_password('changed123'))
+
+    def test_other_users_tasks_are_not_found(self):
+        bob = User.objects.create_user('bob', 'bob@example.com', 'secret123')
+        task = Task.objects.create(user=bob, title='Not mine')
+        self.assertEqual(self.client.get(f'/api/tasks/{task.pk}/').status_code, 404)
+
+
+class UserCacheTests(TestCase):
+
+    @override_settings(AUTH_USER_CACHE_SIZE=2)
+    def test_evicts_least_recently_used(self):
+        users = UserCache()
+        users.set('1', 'one', 1)
+        users.set('2', 'two', 1)
+        users.get('1', 1)
+        users.set('3', 'three', 1)
+        self.assertEqual([users.get(key, 1) for key in '123'], ['one', None, 'three'])
+
+    @override_settings(AUTH_USER_CACHE_TIMEOUT=0)
+    def test_entries_expire(self):
+        users = UserCache()
+        users.set('1', 'one', 1)
+        self.assertIsNone(users.get('1', 1))
+
+    def test_entries_of_other_versions_are_dropped(self):
+        users = UserCache()
+        users.set('1', 'one', 1)
+        self.assertIsNone(users.get('1', 2))
+        self.assertIsNone(users.get('1', 1))
+
+
+class PasswordHashingPoolTests(TestCase):
+    credentials = {'username': 'carol', 'password': 'Secret123x'}
+
+    def test_register_and_login(self):
+        response = self.client.post('/api/auth/register/', {
+            **self.credentials, 'password2': 'Secret123x', 'email': 'Carol@Example.com'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.get(username='carol')
+        self.assertTrue(user.check_password('Secret123x'))
+        self.assertEqual(user.email, 'carol@example.com')
+
+        response = self.client.post('/api/auth/login/', self.credentials, content_type='application/json')
+        self.assertEqual(response.json()['user']['id'], user.id)
+        response = self.client.post('/api/auth/login/', {**self.credentials, 'password': 'Wrong1234x'},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_login_matches_sync(self):
+        await User.objects.acreate(username='carol', password=await sync_to_async(hash_password)('Secret123x'))
+        factory = AsyncRequestFactory()
+        for password, status_code in [('Secret123x', 200), ('Wrong1234x', 400)]:
+            with self.subTest(password=password):
+                body = {**self.credentials, 'password': password}
+                request = factory.post('/api/auth/login/', body, content_type='application/json')
+                response = await AsyncLoginView.as_view()(request)
+                expected = await sync_to_async(self.client.post)('/api/auth/login/', body,
+                                                                 content_type='application/json')
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual(json.loads(response.content).keys(), expected.json().keys())
+
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=1, PASSWORD_HASH_QUEUE_TIMEOUT=0.01)
+    def test_full_pool_pushes_back(self):
+        pool = HashingPool()
+        self.addCleanup(pool.shutdown)
+        slow = threading.Thread(target=pool.run, args=(time.sleep, 1))
+        slow.start()
+        self.addCleanup(slow.join)
+        time.sleep(0.1)
+        with self.assertRaises(PasswordHashingBusy):
+            pool.run(time.sleep, 0)
+
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_MAX_PENDING=1, PASSWORD_HASH_QUEUE_TIMEOUT=5)
+    async def test_cancelled_wait_gives_up_its_slot(self):
+        pool = HashingPool()
+        self.addCleanup(pool.shutdown)
+        # Started first, so the slow job takes its time and no more
+        await pool.arun(pow, 2, 3)
+        slow = asyncio.ensure_future(pool.arun(time.sleep, 0.5))
+        await asyncio.sleep(0.1)
+        waiting = asyncio.ensure_future(pool.arun(pow, 2, 3))
+        await asyncio.sleep(0.1)
+        waiting.cancel()
+        await slow
+        self.assertEqual(await pool.arun(pow, 2, 3), 8)
+
+    @override_settings(PASSWORD_HASH_WORKERS=1)
+    def test_pool_recovers_from_a_dying_worker(self):
+        pool = HashingPool()
+        self.addCleanup(pool.shutdown)
+        # The worker exits mid-job, on the first attempt and on the retry
+        with self.assertRaises(PasswordHashingBusy):
+            pool.run(os._exit, 1)
+        self.assertEqual(pool.run(pow, 2, 3), 8)
+
+    def test_busy_login_is_503(self):
+        with mock.patch('accounts.backends.check_password', side_effect=PasswordHashingBusy('busy')):
+            User.objects.create_user('carol', password='Secret123x')
+            response = self.client.post('/api/auth/login/', self.credentials, content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+
+
+class RegistrationUniquenessTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_user('Alice', 'Alice@Example.com')
+
+    def register(self, username, email):
+        return self.client.post('/api/auth/register/', {
+            'username': username, 'email': email, 'password': 'Secret123x', 'password2': 'Secret123x'
+        }, content_type='application/json')
+
+    def test_taken_username_and_email_ignore_case(self):
+        details = self.register('ALICE', 'alice@example.COM').json()['details']
+        self.assertEqual(set(details), {'username', 'email'})
+        self.assertEqual(set(self.register('alice', 'new@example.com').json()['details']), {'username'})
+        self.assertEqual(set(self.register('bob', 'ALICE@example.com').json()['details']), {'email'})
+
+    def test_database_rejects_case_duplicates(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create_user('aLiCe')
+        # Users without an email do not collide
+        User.objects.create_user('bob')
+        User.objects.create_user('carol')
+
+    def test_profile_email_ignores_case(self):
+        bob = User.objects.create_user('bob', 'bob@example.com')
+        client = APIClient()
+        client.force_authenticate(bob)
+        response = client.patch('/api/auth/profile/', {'email': 'ALICE@example.com'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+        self.assertEqual(client.patch('/api/auth/profile/', {'email': 'BOB@example.com'}, format='json').status_code, 200)
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_one_query_on_lower_indexes(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(RegisterSerializer.find_taken('alice', 'new@example.com'), (True, False))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + ctx.captured_queries[0]['sql'])
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        self.assertIn('auth_user_username_lower_uniq', plan)
+        self.assertIn('auth_user_email_lower_uniq', plan)
+        self.assertNotIn('SCAN', plan)
+
+
+@override_settings(PROFILE_IMAGE_WORKERS=0)
+class ProfileImageTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        user_cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret123')
+        self.client = self.client_for(self.user)
+
+        output = io.BytesIO()
+        Image.new('RGB', (800, 600), 'teal').save(output, 'JPEG')
+        self.photo = output.getvalue()
+
+    def client_for(self, user):
+        # Tokens rather than force_authenticate, which reuses one user
+        # instance and with it a stale cached preferences row
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client
+
+    def upload(self, client=None, content=None):
+        upload = SimpleUploadedFile('me.jpg', content or self.photo, content_type='image/jpeg')
+        with self.captureOnCommitCallbacks(execute=True):
+            return (client or self.client).post('/api/auth/upload-profile-image/', {'profile_image': upload})
+
+    def test_upload_serves_thumbnails(self):
+        self.assertEqual(self.upload().status_code, 200)
+        preferences = UserPreferences.objects.get(user=self.user)
+        digest = preferences.thumbnail_hash
+        self.assertEqual(os.path.basename(preferences.profile_image.name), f'{digest}.jpg')
+        for size in (64, 128, 256):
+            with default_storage.open(thumbnail_name(digest, size)) as stored, Image.open(stored) as thumbnail:
+                self.assertEqual(thumbnail.size, (size, size))
+
+        self.assertTrue(self.client.get('/api/auth/profile/').json()['profile_image'].endswith(f'{digest}-128.webp'))
+        url = self.client.get('/api/auth/profile/?image_size=200').json()['profile_image']
+        self.assertTrue(url.endswith(f'{digest}-256.webp'))
+
+    def test_identical_uploads_share_files(self):
+        self.upload()
+        client = self.client_for(User.objects.create_user('bob', 'bob@example.com', 'secret123'))
+        with mock.patch('accounts.images.schedule') as schedule:
+            self.upload(client)
+        schedule.assert_not_called()
+        mine, theirs = UserPreferences.objects.order_by('user_id')
+        self.assertEqual((mine.profile_image.name, mine.thumbnail_hash), (theirs.profile_image.name, theirs.thumbnail_hash))
+
+        # Files are removed with the last user that refers to them
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete('/api/auth/upload-profile-image/')
+        self.assertTrue(default_storage.exists(theirs.profile_image.name))
+        with self.captureOnCommitCallbacks(execute=True):
+            client.delete('/api/auth/upload-profile-image/')
+        self.assertFalse(default_storage.exists(theirs.profile_image.name))
+        self.assertFalse(default_storage.exists(thumbnail_name(theirs.thumbnail_hash, 128)))
+
+    def test_upload_restores_files_released_meanwhile(self):
+        self.upload()
+        preferences = UserPreferences.objects.get(user=self.user)
+        files = [preferences.profile_image.name] + [
+            thumbnail_name(preferences.thumbnail_hash, size) for size in (64, 128, 256)
+        ]
+        upload = SimpleUploadedFile('me.jpg', self.photo, content_type='image/jpeg')
+        client = self.client_for(User.objects.create_user('bob', 'bob@example.com', 'secret123'))
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post('/api/auth/upload-profile-image/', {'profile_image': upload})
+            # As a release() that checked for references before this upload committed
+            for name in files:
+                default_storage.delete(name)
+        self.assertTrue(all(default_storage.exists(name) for name in files))
+
+    @override_settings(PROFILE_IMAGE_MAX_BYTES=1024 * 1024)
+    def test_rejects_large_uploads(self):
+        response = self.upload(content=self.photo + bytes(1024 * 1024))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['details'], 'Upload an image of at most 1 MB')
+        self.assertFalse(UserPreferences.objects.get(user=self.user).profile_image)
+
+    def test_rejects_non_images(self):
+        response = self.upload(content=b'not an image')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserPreferences.objects.filter(user=self.user).exclude(profile_image='').exists())
+
+
+@override_settings(PREFERENCES_CACHE_ALIAS='default')
+class PreferencesCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret123')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def preferences_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in ctx.captured_queries if '"accounts_userpreferences"' in query['sql']]
+
+    def test_reads_are_cached(self):
+        queries = self.preferences_queries('/api/auth/preferences/')
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0].startswith('SELECT'))
+        self.assertEqual(self.preferences_queries('/api/auth/preferences/'), [])
+        self.assertEqual(self.preferences_queries('/api/auth/profile/'), [])
+
+    @override_settings(PREFERENCES_CACHE_ALIAS=None)
+    def test_no_caching_without_a_shared_cache(self):
+        self.assertEqual(len(self.preferences_queries('/api/auth/preferences/')), 1)
+        self.assertEqual(len(self.preferences_queries('/api/auth/preferences/')), 1)
+
+    def test_updates_are_seen_at_once(self):
+        self.client.get('/api/auth/preferences/')
+        self.client.put('/api/auth/preferences/', {'dark_mode': True}, format='json')
+        self.assertTrue(self.client.get('/api/auth/preferences/').json()['dark_mode'])
+
+    def test_users_have_preferences_from_creation(self):
+        self.assertTrue(UserPreferences.objects.filter(user=self.user).exists())
+        self.client.post('/api/auth/register/', {
+            'username': 'bob', 'email': 'bob@example.com', 'password': 'Secret123x', 'password2': 'Secret123x'
+        }, format='json')
+        self.assertTrue(UserPreferences.objects.filter(user__username='bob').exists())
+
+    def test_missing_row_reads_as_defaults(self):
+        UserPreferences.objects.filter(user=self.user).delete()
+        self.assertEqual(self.client.get('/api/auth/preferences/').json()['default_priority'], 'medium')
+        self.assertFalse(UserPreferences.objects.filter(user=self.user).exists())
+
+        self.client.put('/api/auth/preferences/', {'default_priority': 'high'}, format='json')
+        self.assertEqual(self.client.get('/api/auth/preferences/').json()['default_priority'], 'high')
@@ -1,10 +1,15 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
+from .async_views import AsyncLoginView
 from .views import RegisterView, LoginView, UserProfileView, UserPreferencesView, DeleteAccountView, UploadProfileImageView
 
+# Under ASGI (TASK_ASYNC_VIEWS) logins await the hashing pool instead of holding a thread
+login_view = AsyncLoginView if getattr(settings, 'TASK_ASYNC_VIEWS', False) else LoginView
+
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
-    path('login/', LoginView.as_view(), name='login'),
+    path('login/', login_view.as_view(), name='login'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('preferences/', UserPreferencesView.as_view(), name='preferences'),
@@ -1,12 +1,20 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import SAFE_METHODS, AllowAny
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import RegisterSerializer, LoginSerializer, UserSerializer, UserProfileSerializer, UserPreferencesSerializer
+from .hashing import PasswordHashingBusy
+from .images import clear_profile_image, profile_image_url, replace_profile_image, requested_size
 from .models import UserPreferences
+from .preferences import get_preferences
+
+
+def busy_payload(error):
+    """Body and headers of the 503 sent when the password hashing pool is full"""
+    return {'error': 'Server busy', 'details': str(error)}, {'Retry-After': '1'}
 
 
 class RegisterView(generics.CreateAPIView):
@@ -29,6 +37,9 @@ class RegisterView(generics.CreateAPIView):
                 'access': str(refresh.access_token),
                 'message': 'User registered successfully'
             }, status=status.HTTP_201_CREATED)
+        except PasswordHashingBusy as e:
+            data, headers = busy_payload(e)
+            return Response(data, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers=headers)
         except Exception as e:
             return Response({
                 'error': 'Registration failed',
@@ -50,32 +61,43 @@ class LoginView(APIView):
             serializer.is_valid(raise_exception=True)
             user = serializer.validated_data['user']
             
-            refresh = RefreshToken.for_user(user)
-            
-            return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name
-                },
-                'message': 'Login successful'
-            }, status=status.HTTP_200_OK)
+            return Response(self.login_payload(user), status=status.HTTP_200_OK)
+        except PasswordHashingBusy as e:
+            data, headers = busy_payload(e)
+            return Response(data, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers=headers)
         except Exception as e:
             return Response({
                 'error': 'Login failed',
                 'details': serializer.errors if hasattr(serializer, 'errors') else str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
 
+    @staticmethod
+    def login_payload(user):
+        refresh = RefreshToken.for_user(user)
+        
+        return {
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            'user': {
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name
+            },
+            'message': 'Login successful'
+        }
+
 
 class UserProfileView(generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
 
     def get_object(self):
-        return self.request.user
+        if self.request.method in SAFE_METHODS:
+            return self.request.user
+        # request.user may be an older copy from the authentication cache;
+        # saving it would write back its password and flags
+        return User.objects.get(pk=self.request.user.pk)
     
     def get_serializer_context(self):
         return {'request': self.request}
@@ -86,12 +108,13 @@ class UserPreferencesView(APIView):
     
     def get(self, request):
         """Get user preferences"""
-        preferences, created = UserPreferences.objects.get_or_create(user=request.user)
+        preferences = get_preferences(request.user)
         serializer = UserPreferencesSerializer(preferences, context={'request': request})
         return Response(serializer.data)
     
     def put(self, request):
         """Update user preferences"""
+        # From the database rather than the cache, as every field is saved
         preferences, created = UserPreferences.objects.get_or_create(user=request.user)
         serializer = UserPreferencesSerializer(preferences, data=request.data, partial=True, context={'request': request})
         
@@ -108,20 +131,19 @@ class UploadProfileImageView(APIView):
     parser_classes = (MultiPartParser, FormParser)
     
     def post(self, request):
-        """Upload profile image"""
+        """Upload profile image; thumbnails are built in the background"""
         if 'profile_image' not in request.FILES:
             return Response({'error': 'No image file provided'}, status=status.HTTP_400_BAD_REQUEST)
         
         preferences, created = UserPreferences.objects.get_or_create(user=request.user)
         
-        # Delete old image if exists
-        if preferences.profile_image:
-            preferences.profile_image.delete(save=False)
-        
-        preferences.profile_image = request.FILES['profile_image']
-        preferences.save()
+        try:
+            # Releases the old image unless another user shares it
+            replace_profile_image(preferences, request.FILES['profile_image'])
+        except ValueError as e:
+            return Response({'error': 'Invalid image', 'details': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        image_url = request.build_absolute_uri(preferences.profile_image.url)
+        image_url = profile_image_url(preferences, request, requested_size(request))
         
         return Response({
             'message': 'Profile image uploaded successfully',
@@ -133,7 +155,7 @@ class UploadProfileImageView(APIView):
         try:
             preferences = UserPreferences.objects.get(user=request.user)
             if preferences.profile_image:
-                preferences.profile_image.delete(save=True)
+                clear_profile_image(preferences)
                 return Response({'message': 'Profile image deleted successfully'})
             return Response({'error': 'No profile image to delete'}, status=status.HTTP_404_NOT_FOUND)
         except UserPreferences.DoesNotExist:
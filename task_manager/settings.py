@@ -102,6 +102,31 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Swap the backend (e.g. Redis or Memcached) to share cached summaries
+# between worker processes.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Cache alias and timeout (seconds) for per-user task summaries. Writes
+# invalidate immediately; the timeout bounds staleness of time-based
+# counters such as overdue tasks.
+TASK_CACHE_ALIAS = "default"
+TASK_CACHE_TIMEOUT = 60
+
+# Cache for each user's preferences, kept TIMEOUT seconds and dropped when
+# they are saved. It must be shared by every server process (e.g. Redis):
+# with a per-process one such as LocMemCache, other processes would serve
+# the old row after a save. None, the default, reads them from the database.
+PREFERENCES_CACHE_ALIAS = None
+PREFERENCES_CACHE_TIMEOUT = 60
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -123,17 +148,99 @@ STATIC_URL = "static/"
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Profile images (accounts/images.py) are served as square thumbnails of
+# these sizes in pixels, built on PROFILE_IMAGE_WORKERS background threads
+# (0 builds them during the upload request). Clients pick one with
+# ?image_size=, DEFAULT_SIZE otherwise. Files under media/profile_images/
+# are named by content hash and never change, so the web server can send
+# them with "Cache-Control: public, max-age=31536000, immutable". Uploads
+# larger than MAX_BYTES are rejected without being read
+PROFILE_IMAGE_SIZES = (64, 128, 256)
+PROFILE_IMAGE_DEFAULT_SIZE = 128
+PROFILE_IMAGE_WORKERS = 1
+PROFILE_IMAGE_MAX_BYTES = 5 * 1024 * 1024
+
 from datetime import timedelta
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
 }
 
+# Default page size of the opt-in cursor pagination on /api/tasks/
+TASK_PAGE_SIZE = 50
+
+# How long deleted task ids are kept for /api/tasks/changes/ clients; older
+# cursors get a full resync. Prune with `manage.py prune_task_tombstones`.
+TASK_TOMBSTONE_RETENTION_DAYS = 30
+
+# Seconds the /api/tasks/changes/ cursor lags the read, so writes whose
+# transaction commits after it are still sent; clients see them twice
+TASK_SYNC_CURSOR_MARGIN = 10
+
+# Maximum number of ranked results for ?q= task search on SQLite. Responses
+# cut at the limit carry X-Search-Truncated: true
+TASK_SEARCH_LIMIT = 200
+
+# Rows fetched per database round trip when streaming /api/tasks/export/
+TASK_EXPORT_CHUNK_SIZE = 2000
+
+# Rows per bulk_create/transaction and error lines reported by task imports
+TASK_IMPORT_BATCH_SIZE = 500
+TASK_IMPORT_MAX_ERRORS = 100
+
+# Serve the task read endpoints from tasks/async_views.py. Only worthwhile
+# when running under an ASGI server (task_manager/asgi.py), e.g. uvicorn
+TASK_ASYNC_VIEWS = False
+
+# Notification scheduler (`manage.py run_scheduler`): reminders go out this
+# long before the due date, sweeps run every interval seconds in batches of
+# the given size, and the first sweep reaches back the catch-up period.
+# Tasks saved into the window a sweep has passed are picked up by the next
+# one; the margin (seconds) covers transactions that commit late.
+TASK_REMINDER_LEAD_MINUTES = 60
+TASK_SCHEDULER_INTERVAL = 60
+TASK_SCHEDULER_BATCH_SIZE = 5000
+TASK_SCHEDULER_CATCHUP_HOURS = 24
+TASK_SCHEDULER_CHANGE_MARGIN = 60
+
+# Live task events (/api/tasks/events/). The backend must be shared between
+# processes (e.g. Redis pub/sub) when running more than one ASGI worker; the
+# local one reaches subscribers in the same process only. Slow subscribers
+# get a resync after the given number of pending events, idle streams a
+# keepalive every heartbeat seconds, and streams are closed (the browser
+# reconnects) after the timeout in seconds
+TASK_EVENTS_BACKEND = "tasks.events.LocalBroker"
+TASK_EVENTS_MAX_PENDING = 100
+TASK_EVENTS_HEARTBEAT = 15
+TASK_EVENTS_STREAM_TIMEOUT = 300
+
+# Passwords can be hashed and checked on a pool of worker processes
+# (accounts/hashing.py). 0, the default, hashes inline on the request worker.
+# Deployments enable the pool by setting WORKERS, e.g. to half the cores, so
+# a burst of logins leaves the rest for the task API. At most MAX_PENDING
+# logins are queued or running; further ones wait up to QUEUE_TIMEOUT
+# seconds, then get a 503. Each server process starts its own pool: with N
+# processes up to N * WORKERS hashing processes run, so divide accordingly.
+AUTHENTICATION_BACKENDS = ["accounts.backends.PooledModelBackend"]
+PASSWORD_HASH_WORKERS = 0
+PASSWORD_HASH_MAX_PENDING = 32
+PASSWORD_HASH_QUEUE_TIMEOUT = 5
+
+# Per-process cache of users resolved from access tokens: at most SIZE
+# users, each for at most TIMEOUT seconds. Saving or deleting a user bumps
+# its version in the cache named by AUTH_USER_CACHE_ALIAS, which drops the
+# stale copies on their next use; that cache must be shared (e.g. Redis)
+# for this to reach other processes. Writes that send no signals, such as
+# QuerySet.update(), must call accounts.authentication.invalidate_user()
+AUTH_USER_CACHE_SIZE = 1024
+AUTH_USER_CACHE_TIMEOUT = 60
+AUTH_USER_CACHE_ALIAS = "default"
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
 }
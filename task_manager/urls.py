@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from tasks.views import DashboardView
 from .views import home, register_page, login_page, dashboard_page, tasks_page, calendar_page, settings_page
 
 urlpatterns = [
@@ -15,6 +16,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/auth/', include('accounts.urls')),
     path('api/tasks/', include('tasks.urls')),
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,93 @@
+from datetime import datetime, time
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def _counts(conditions):
+    return {
+        name: Count('id', filter=condition) if condition is not None else Count('id')
+        for name, condition in conditions.items()
+    }
+
+
+def aggregate_counts(queryset, **conditions):
+    """
+    Compute several filtered COUNTs over a queryset in a single query.
+
+    Each keyword maps an output name to a ``Q`` condition, or ``None`` for an
+    unfiltered count. Returns a dict of the same names mapped to integers.
+    """
+    return queryset.aggregate(**_counts(conditions))
+
+
+async def aaggregate_counts(queryset, **conditions):
+    """Async version of ``aggregate_counts``"""
+    return await queryset.aaggregate(**_counts(conditions))
+
+
+def _sums(columns):
+    aggregates = {}
+    for name, column in columns.items():
+        column, condition = column if isinstance(column, tuple) else (column, None)
+        aggregates[name] = Sum(column, filter=condition)
+    return aggregates
+
+
+def aggregate_sums(queryset, **columns):
+    """
+    Sum several columns, optionally filtered, over a queryset in a single
+    query. Each keyword maps an output name to a column name or a
+    ``(column, Q)`` pair. Empty sums come back as 0.
+    """
+    return {name: value or 0 for name, value in queryset.aggregate(**_sums(columns)).items()}
+
+
+async def aaggregate_sums(queryset, **columns):
+    """Async version of ``aggregate_sums``"""
+    return {name: value or 0 for name, value in (await queryset.aaggregate(**_sums(columns))).items()}
+
+
+def status_conditions(now=None):
+    """
+    Conditions for the status counters shown on the dashboard
+    (total, completed, pending, overdue)
+    """
+    now = now or timezone.now()
+    return {
+        'total': None,
+        'completed': Q(status='completed'),
+        'pending': Q(status='pending'),
+        'overdue': Q(status='pending', due_date__lt=now),
+    }
+
+
+def start_of_day(date):
+    """Aware datetime for midnight at the start of ``date`` in the current timezone"""
+    return timezone.make_aware(datetime.combine(date, time.min))
+
+
+def _daily_count_rows(queryset, field, start_date):
+    return (
+        queryset
+        .filter(**{f'{field}__gte': start_of_day(start_date)})
+        .annotate(day=TruncDate(field))
+        .values('day')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def daily_counts(queryset, field, start_date):
+    """
+    Count rows per calendar day of ``field`` from ``start_date`` onwards in a
+    single grouped query. Returns a dict mapping ``date`` to count; days with
+    no rows are absent.
+    """
+    return {row['day']: row['count'] for row in _daily_count_rows(queryset, field, start_date)}
+
+
+async def adaily_counts(queryset, field, start_date):
+    """Async version of ``daily_counts``"""
+    return {row['day']: row['count'] async for row in _daily_count_rows(queryset, field, start_date)}
@@ -0,0 +1,277 @@
+"""
+Async implementations of the read endpoints, for use under an ASGI server
+(see task_manager/asgi.py and the TASK_ASYNC_VIEWS setting).
+
+They return the same payloads as the DRF views in views.py and reuse their
+query building and payload code, but run the queries through Django's async
+ORM and evaluate independent queries together with ``asyncio.gather``.
+Writes, and reads the async views do not cover, fall back to the DRF view.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from accounts.authentication import CachedJWTAuthentication
+from .aggregates import aaggregate_counts, aaggregate_sums, adaily_counts
+from .cache import aget_or_compute
+from .conditional import atask_collection_etag, atask_detail_validators
+from .events import RESYNC, get_broker
+from .models import Task
+from .serializers import TaskRowSerializer, TaskSerializer
+from .views import (
+    DailySummaryView, SparseFieldsetMixin, TaskAnalyticsView, TaskCalendarView,
+    TaskDetailView, TaskFilterMixin, TaskListCreateView, TaskSummaryView,
+)
+
+
+async def alist(queryset):
+    return [row async for row in queryset]
+
+
+async def authenticate(request, token_param=None):
+    """
+    The user of the request's JWT, as the DRF views would resolve it, or
+    None without a token. Raises AuthenticationFailed for bad tokens.
+    Without an Authorization header the token is read from the
+    ``token_param`` query parameter, if given.
+    """
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None and token_param and request.GET.get(token_param):
+        raw_token = request.GET[token_param].encode()
+    if raw_token is None:
+        return None
+
+    return await authentication.aget_user(authentication.get_validated_token(raw_token))
+
+
+class AsyncAPIView(View):
+    """
+    Async GET handler that authenticates like the DRF views and renders JSON
+    the same way. Other methods, and GETs ``use_sync_view()`` rejects, are
+    passed on to ``sync_view``, or answered with a 405 without one.
+    """
+    sync_view = None
+    token_query_param = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # JWT only, like the DRF views
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def use_sync_view(self, request):
+        return False
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or self.use_sync_view(request):
+            if self.sync_view is None:
+                return HttpResponseNotAllowed(['GET', 'HEAD'])
+            return await sync_to_async(self.sync_view.as_view())(request, *args, **kwargs)
+
+        try:
+            user = await authenticate(request, self.token_query_param)
+            if user is None:
+                raise NotAuthenticated()
+            request.user = user
+            # DRF request for the mixins shared with the sync views
+            self.request = Request(request)
+            self.request.user = user
+            return await self.get(request, *args, **kwargs)
+        except APIException as exc:
+            response = self.render(exc.detail, exc.status_code)
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                response['WWW-Authenticate'] = CachedJWTAuthentication().authenticate_header(request)
+            return response
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status_code)
+
+    async def conditional(self, request, respond, etag=None, last_modified=None):
+        """
+        ``django.views.decorators.http.condition`` for validators computed
+        asynchronously: a 304 when the client's copy is current, else the
+        response of the ``respond`` coroutine function with ETag and
+        Last-Modified set
+        """
+        etag = quote_etag(etag) if etag else None
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await respond()
+        if last_modified and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(last_modified)
+        if etag:
+            response.headers.setdefault('ETag', etag)
+        return response
+
+
+class AsyncTaskListView(SparseFieldsetMixin, TaskFilterMixin, AsyncAPIView):
+    sync_view = TaskListCreateView
+
+    def use_sync_view(self, request):
+        # Pagination and SQLite full-text search have no async ORM path
+        return any(name in request.GET for name in ('cursor', 'page_size', 'q'))
+
+    async def get(self, request):
+        row_serializer = TaskRowSerializer(self.get_fieldset())
+        queryset = self.get_queryset().values(*row_serializer.fields)
+
+        async def respond():
+            return self.render(row_serializer.serialize(await alist(queryset)))
+
+        return await self.conditional(request, respond, etag=await atask_collection_etag(request))
+
+
+class AsyncTaskDetailView(SparseFieldsetMixin, AsyncAPIView):
+    sync_view = TaskDetailView
+
+    async def get(self, request, pk):
+        fieldset = self.get_fieldset()
+        etag, last_modified = await atask_detail_validators(request, pk)
+
+        async def respond():
+            queryset = self.apply_fieldset(Task.objects.filter(user=request.user))
+            task = await queryset.filter(pk=pk).afirst()
+            if task is None:
+                return self.render({'detail': 'No Task matches the given query.'}, status.HTTP_404_NOT_FOUND)
+            return self.render(TaskSerializer(task, fields=fieldset).data)
+
+        return await self.conditional(request, respond, etag=etag, last_modified=last_modified)
+
+
+class AsyncTaskSummaryView(AsyncAPIView):
+    sync_view = TaskSummaryView
+
+    async def get(self, request):
+        async def summarize():
+            now = timezone.now()
+            conditions, period = TaskSummaryView.period_conditions(request.GET, now)
+            counts = await aaggregate_counts(Task.objects.filter(user=request.user), **conditions)
+            return TaskSummaryView.build_summary(counts, period)
+
+        return self.render(await aget_or_compute(request.user.id, 'summary', request.GET.dict(), summarize))
+
+
+class AsyncTaskAnalyticsView(AsyncAPIView):
+    sync_view = TaskAnalyticsView
+
+    async def get(self, request):
+        days = TaskAnalyticsView.parse_window(request.GET)
+        if days is None:
+            return self.render(TaskAnalyticsView.window_error(), status.HTTP_400_BAD_REQUEST)
+
+        async def analyze():
+            now = timezone.now()
+            rows, (stats, columns), overdue = TaskAnalyticsView.analytics_queries(request.user, days, now)
+            rows, counts, overdue = await asyncio.gather(
+                alist(rows),
+                aaggregate_sums(stats, **columns),
+                overdue.acount(),
+            )
+            return TaskAnalyticsView.build_analytics(days, now, rows, counts, overdue)
+
+        return self.render(await aget_or_compute(request.user.id, 'analytics', {'days': days}, analyze))
+
+
+class AsyncTaskCalendarView(AsyncAPIView):
+    sync_view = TaskCalendarView
+
+    async def get(self, request):
+        try:
+            first_day, next_day, period = TaskCalendarView.parse_range(request.GET)
+        except ValueError as e:
+            return self.render({
+                'error': 'Invalid date range',
+                'details': str(e)
+            }, status.HTTP_400_BAD_REQUEST)
+
+        tasks = TaskCalendarView.range_tasks(request.user, first_day, next_day)
+
+        async def respond():
+            if request.GET.get('counts') == 'true':
+                counts = await adaily_counts(tasks, 'due_date', first_day)
+                return self.render(TaskCalendarView.build_counts(period, counts))
+            rows = await alist(TaskCalendarView.task_rows(tasks))
+            return self.render(TaskCalendarView.build_tasks_by_date(period, rows))
+
+        return await self.conditional(request, respond, etag=await atask_collection_etag(request))
+
+
+class AsyncDailySummaryView(AsyncAPIView):
+    sync_view = DailySummaryView
+
+    async def get(self, request):
+        async def summarize_day():
+            today = timezone.localdate()
+            queries = DailySummaryView.daily_queries(request.user, today)
+            counted, conditions = queries['counts']
+            tasks_today, tasks_tomorrow, overdue_tasks, counts, completed_today = await asyncio.gather(
+                alist(queries['tasks_today']),
+                alist(queries['tasks_tomorrow']),
+                alist(queries['overdue_tasks']),
+                aaggregate_counts(counted, **conditions),
+                queries['completed_today'].afirst(),
+            )
+            return DailySummaryView.build_daily_summary(
+                today, tasks_today, tasks_tomorrow, overdue_tasks, counts, completed_today or 0
+            )
+
+        return self.render(await aget_or_compute(request.user.id, 'daily-summary', {}, summarize_day))
+
+
+class TaskEventStreamView(AsyncAPIView):
+    """
+    Server-sent events for the user's task writes: ``task.created`` and
+    ``task.updated`` carry the task, ``task.deleted`` its id, and ``resync``
+    means events were dropped and the client should refetch. Each stream
+    ends after TASK_EVENTS_STREAM_TIMEOUT seconds and the browser
+    reconnects, so a connection is never held indefinitely.
+
+    Streaming needs an ASGI server; under WSGI the response would be
+    buffered, so it answers 204 instead, which stops EventSource retrying.
+    """
+    # EventSource cannot send an Authorization header
+    token_query_param = 'token'
+    reconnect_ms = 3000
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+        response = StreamingHttpResponse(self.stream(request.user.id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, user_id):
+        heartbeat = getattr(settings, 'TASK_EVENTS_HEARTBEAT', 15)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + getattr(settings, 'TASK_EVENTS_STREAM_TIMEOUT', 300)
+        async with get_broker().subscribe(user_id) as subscription:
+            yield f'retry: {self.reconnect_ms}\n\n'
+            while (remaining := deadline - loop.time()) > 0:
+                event = await subscription.get(timeout=min(heartbeat, remaining))
+                if event is None:
+                    # Comment line, keeps proxies from closing an idle connection
+                    yield ': keepalive\n\n'
+                    continue
+                yield self.format_event(event)
+                if event is RESYNC:
+                    return
+
+    def format_event(self, event):
+        data = JSONRenderer().render(event.get('data', {})).decode()
+        return f"event: {event['type']}\ndata: {data}\n\n"
@@ -0,0 +1,91 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+# In-process hit/miss counters, exposed through TaskCacheStatsView
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[getattr(settings, 'TASK_CACHE_ALIAS', 'default')]
+
+
+def _version_key(user_id):
+    return f'tasks:version:{user_id}'
+
+
+def get_user_version(user_id):
+    """Current cache version for a user's task data"""
+    return _cache().get_or_set(_version_key(user_id), 1, timeout=None)
+
+
+def bump_user_version(user_id):
+    """Invalidate every cached result for a user by moving to a new version"""
+    cache = _cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        # No version stored yet (or it was evicted); anything cached under
+        # the old version is unreachable once a fresh counter is set
+        cache.set(_version_key(user_id), 2, timeout=None)
+
+
+def _result_key(user_id, name, params, version):
+    query = '&'.join(f'{key}={params[key]}' for key in sorted(params))
+    digest = hashlib.md5(query.encode()).hexdigest()
+    return f'tasks:{name}:{user_id}:v{version}:{digest}'
+
+
+def get_or_compute(user_id, name, params, compute):
+    """
+    Return the cached result of ``compute()`` for a user, view name and query
+    parameters, computing and storing it on a miss.
+    """
+    cache = _cache()
+    key = _result_key(user_id, name, params, get_user_version(user_id))
+    result = cache.get(key)
+    if result is not None:
+        _record('hits')
+        return result
+
+    _record('misses')
+    result = compute()
+    cache.set(key, result, timeout=getattr(settings, 'TASK_CACHE_TIMEOUT', 60))
+    return result
+
+
+async def aget_or_compute(user_id, name, params, compute):
+    """Async version of ``get_or_compute``; ``compute`` is a coroutine function"""
+    cache = _cache()
+    version = await cache.aget_or_set(_version_key(user_id), 1, timeout=None)
+    key = _result_key(user_id, name, params, version)
+    result = await cache.aget(key)
+    if result is not None:
+        _record('hits')
+        return result
+
+    _record('misses')
+    result = await compute()
+    await cache.aset(key, result, timeout=getattr(settings, 'TASK_CACHE_TIMEOUT', 60))
+    return result
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def cache_stats():
+    """Hit/miss counters for this process"""
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total * 100, 1) if total else 0,
+    }
@@ -0,0 +1,85 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Task
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _user_tasks_state_aggregates():
+    return {'last_modified': Max('updated_at'), 'count': Count('id')}
+
+
+def user_tasks_state(request):
+    """
+    Latest update time and row count of the user's tasks, fetched once per
+    request. Any create, edit or delete changes at least one of the two.
+    """
+    if not hasattr(request, '_tasks_state'):
+        request._tasks_state = Task.objects.filter(user=request.user).aggregate(
+            **_user_tasks_state_aggregates()
+        )
+    return request._tasks_state
+
+
+# Filters comparing due dates with the current instant; their results
+# change with the clock even when no task does
+NOW_RELATIVE_FILTERS = ('overdue', 'upcoming')
+
+
+def _collection_etag(request, state):
+    if any(request.GET.get(name) == 'true' for name in NOW_RELATIVE_FILTERS):
+        return None
+    # The date covers responses that default to the current day or month,
+    # such as the calendar without ?year=&month=
+    return _etag(
+        request.user.id, state['last_modified'], state['count'], request.get_full_path(), timezone.localdate()
+    )
+
+
+def task_collection_etag(request, *args, **kwargs):
+    """ETag for views listing the user's tasks, per query string"""
+    return _collection_etag(request, user_tasks_state(request))
+
+
+async def atask_collection_etag(request, *args, **kwargs):
+    """Async version of ``task_collection_etag``"""
+    if not hasattr(request, '_tasks_state'):
+        request._tasks_state = await Task.objects.filter(user=request.user).aaggregate(
+            **_user_tasks_state_aggregates()
+        )
+    return _collection_etag(request, request._tasks_state)
+
+
+def _task_updated_at_query(request, pk):
+    return Task.objects.filter(user=request.user, pk=pk).values_list('updated_at', flat=True)
+
+
+def _task_updated_at(request, pk):
+    if not hasattr(request, '_task_updated_at'):
+        request._task_updated_at = _task_updated_at_query(request, pk).first()
+    return request._task_updated_at
+
+
+def _detail_etag(request, pk, updated_at):
+    # Per query string, as ?fields= and ?exclude= change the representation
+    return _etag(request.user.id, pk, updated_at, request.get_full_path()) if updated_at else None
+
+
+def task_detail_etag(request, pk, *args, **kwargs):
+    return _detail_etag(request, pk, _task_updated_at(request, pk))
+
+
+def task_detail_last_modified(request, pk, *args, **kwargs):
+    return _task_updated_at(request, pk)
+
+
+async def atask_detail_validators(request, pk):
+    """Async ``(etag, last_modified)`` for a task, as the two functions above"""
+    updated_at = await _task_updated_at_query(request, pk).afirst()
+    return _detail_etag(request, pk, updated_at), updated_at
+
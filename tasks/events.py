@@ -0,0 +1,113 @@
+"""
+Publish/subscribe for live task updates, streamed to clients by
+TaskEventStreamView.
+
+The broker is chosen with the TASK_EVENTS_BACKEND setting (a dotted path to
+a class implementing ``publish`` and ``subscribe`` like ``LocalBroker``).
+``LocalBroker`` only reaches subscribers in the same process, which is enough
+for a single ASGI worker and for tests; several workers need a shared backend
+such as Redis pub/sub behind the same interface.
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+# Delivered in place of the queued events when a subscriber falls too far
+# behind; the client should refetch instead of applying events one by one
+RESYNC = {'type': 'resync'}
+
+
+class Subscription:
+    """A subscriber's queue of events, living on the subscriber's event loop"""
+
+    def __init__(self, loop, max_pending):
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._max_pending = max_pending
+
+    def put(self, event):
+        """Queue an event; safe to call from any thread"""
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # The subscriber's loop has already closed
+            pass
+
+    def _put(self, event):
+        if self._queue.qsize() >= self._max_pending:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            event = RESYNC
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        """The next event, or None if none arrives within ``timeout`` seconds"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBroker:
+    """In-process broker: events reach subscribers in this process only"""
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        subscription = Subscription(
+            asyncio.get_running_loop(), getattr(settings, 'TASK_EVENTS_MAX_PENDING', 100)
+        )
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                subscriptions = self._subscriptions.get(user_id, set())
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    self._subscriptions.pop(user_id, None)
+
+    def subscriber_count(self, user_id):
+        with self._lock:
+            return len(self._subscriptions.get(user_id, ()))
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker():
+    """The broker configured by TASK_EVENTS_BACKEND, one instance per process"""
+    path = getattr(settings, 'TASK_EVENTS_BACKEND', 'tasks.events.LocalBroker')
+    with _brokers_lock:
+        if path not in _brokers:
+            _brokers[path] = import_string(path)()
+        return _brokers[path]
+
+
+def publish_task_event(user_id, event_type, data):
+    """
+    Send ``{'type': event_type, 'data': data}`` to the user's subscribers once
+    the current transaction commits, so rolled back writes are never seen.
+    ``data`` may be a callable, evaluated at commit time.
+    """
+    def send():
+        payload = data() if callable(data) else data
+        get_broker().publish(user_id, {'type': event_type, 'data': payload})
+
+    transaction.on_commit(send)
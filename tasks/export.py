@@ -0,0 +1,38 @@
+import csv
+import json
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows, row_serializer):
+    for row in rows:
+        yield json.dumps(row_serializer.to_representation(row)) + '\n'
+
+
+def json_lines(rows, row_serializer):
+    separator = '[\n'
+    for row in rows:
+        yield separator + json.dumps(row_serializer.to_representation(row))
+        separator = ',\n'
+    # An empty export still has to be a valid document
+    yield '[]\n' if separator == '[\n' else '\n]\n'
+
+
+def csv_lines(rows, row_serializer):
+    writer = csv.writer(Echo())
+    yield writer.writerow(row_serializer.fields)
+    for row in rows:
+        data = row_serializer.to_representation(row)
+        yield writer.writerow(['' if data[name] is None else data[name] for name in row_serializer.fields])
+
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'json': (json_lines, 'application/json'),
+    'csv': (csv_lines, 'text/csv'),
+}
@@ -0,0 +1,120 @@
+import codecs
+import csv
+import json
+
+from django.conf import settings
+from django.db import transaction
+
+from .cache import bump_user_version
+from .events import publish_task_event
+from .models import Task
+from .serializers import TaskSerializer
+from .stats import apply_changes, task_state
+
+
+class ImportStopped(Exception):
+    """The input could not be read from ``line`` on"""
+
+    def __init__(self, line, reason):
+        super().__init__(f'Line {line}: {reason}')
+        self.line = line
+        self.reason = str(reason)
+
+
+def ndjson_rows(lines):
+    """
+    Yield ``(line_number, item)`` for each non-blank line; unparseable lines
+    yield their error instead. Raises ImportStopped if a line cannot be decoded.
+    """
+    line_number = 0
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                yield line_number, f'Invalid JSON: {e}'
+                continue
+            yield line_number, item if isinstance(item, dict) else 'Each line must be a JSON object'
+    except UnicodeDecodeError as e:
+        raise ImportStopped(line_number + 1, e) from e
+
+
+def csv_rows(lines):
+    """
+    Yield ``(line_number, item)`` for each CSV record after the header.
+    Empty cells are left out so the field falls back to its default, which
+    lets a CSV export be imported again as is. Raises ImportStopped if a
+    line cannot be decoded or parsed.
+    """
+    reader = csv.DictReader(lines)
+    try:
+        for row in reader:
+            yield reader.line_num, {name: value for name, value in row.items() if name and value not in ('', None)}
+    except UnicodeDecodeError as e:
+        raise ImportStopped(reader.line_num + 1, e) from e
+    except csv.Error as e:
+        # The reader has consumed the offending line
+        raise ImportStopped(reader.line_num, e) from e
+
+
+IMPORT_FORMATS = {
+    'ndjson': ndjson_rows,
+    'csv': csv_rows,
+}
+
+
+def decode_lines(stream):
+    """Decode a binary line iterator (file or upload) as UTF-8, dropping any BOM"""
+    return codecs.iterdecode(stream, 'utf-8-sig')
+
+
+def import_tasks(user, rows, batch_size=None, max_errors=None):
+    """
+    Validate ``(line_number, item)`` rows with the TaskSerializer rules and
+    insert the valid ones for ``user`` with bulk_create, one transaction per
+    batch. Invalid rows are skipped and reported; at most ``max_errors`` of
+    them are listed but all are counted. If the input cannot be read to the
+    end, the rows before the line it stopped at are kept and the summary
+    says where it stopped under "stopped".
+    """
+    batch_size = batch_size or getattr(settings, 'TASK_IMPORT_BATCH_SIZE', 500)
+    max_errors = max_errors if max_errors is not None else getattr(settings, 'TASK_IMPORT_MAX_ERRORS', 100)
+    summary = {'imported': 0, 'failed': 0, 'errors': []}
+    batch = []
+
+    def flush():
+        with transaction.atomic():
+            created = Task.objects.bulk_create(batch)
+            # bulk_create() sends no model signals
+            apply_changes([(None, task_state(task)) for task in created])
+            transaction.on_commit(lambda: bump_user_version(user.id))
+            publish_task_event(user.id, 'tasks.changed', {
+                'created': [task.id for task in created], 'updated': [], 'deleted': []
+            })
+        summary['imported'] += len(created)
+        batch.clear()
+
+    try:
+        for line_number, item in rows:
+            errors = item if isinstance(item, str) else None
+            if errors is None:
+                serializer = TaskSerializer(data=item)
+                if serializer.is_valid():
+                    batch.append(Task(user=user, **serializer.validated_data))
+                    if len(batch) >= batch_size:
+                        flush()
+                    continue
+                errors = serializer.errors
+
+            summary['failed'] += 1
+            if len(summary['errors']) < max_errors:
+                summary['errors'].append({'line': line_number, 'errors': errors})
+    except ImportStopped as e:
+        # Earlier batches are committed already; report exactly what was kept
+        summary['stopped'] = {'line': e.line, 'error': e.reason}
+
+    if batch:
+        flush()
+    return summary
@@ -0,0 +1,52 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.imports import IMPORT_FORMATS, decode_lines, import_tasks
+
+
+class Command(BaseCommand):
+    help = "Import tasks for a user from an NDJSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument(
+            "--user", required=True, help="Username that will own the tasks"
+        )
+        parser.add_argument(
+            "--format",
+            choices=sorted(IMPORT_FORMATS),
+            help="Input format (defaults to the file extension)",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="Rows inserted per transaction"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']!r} does not exist")
+
+        import_format = options["format"] or options["path"].rpartition(".")[2].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(
+                "Cannot tell the format from the file name, pass --format"
+            )
+
+        with open(options["path"], "rb") as stream:
+            rows = IMPORT_FORMATS[import_format](decode_lines(stream))
+            summary = import_tasks(user, rows, batch_size=options["batch_size"])
+
+        for error in summary["errors"]:
+            self.stderr.write(f"Line {error['line']}: {json.dumps(error['errors'])}")
+        if "stopped" in summary:
+            self.stderr.write(
+                f"Stopped at line {summary['stopped']['line']}: {summary['stopped']['error']}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {summary['imported']} tasks, {summary['failed']} failed"
+            )
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task, TaskDailyStats
+from tasks.stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the TaskDailyStats rollup from the task table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="Only rebuild this user id (may be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_daily_stats(Task, TaskDailyStats, user_ids=options["user_ids"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} daily stats rows"))
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tasks.scheduler import sweep
+
+
+class Command(BaseCommand):
+    help = "Record due-soon and overdue task notifications, sweeping periodically"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Run a single sweep and exit"
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=getattr(settings, "TASK_SCHEDULER_INTERVAL", 60),
+            help="Seconds between the start of two sweeps",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, help="Tasks handled per transaction"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                started = time.monotonic()
+                processed = sweep(batch_size=options["batch_size"])
+                summary = ", ".join(
+                    f"{count} {kind}" for kind, count in processed.items()
+                )
+                self.stdout.write(f"Swept {summary}")
+                if options["once"]:
+                    break
+                time.sleep(max(0, options["interval"] - (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            self.stdout.write("Scheduler stopped")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:31
+
+from django.db import migrations
+from django.db.models import F
+
+
+def backfill_completed_at(apps, schema_editor):
+    # Best available estimate for tasks completed before completed_at existed
+    Task = apps.get_model("tasks", "Task")
+    Task.objects.filter(status="completed", completed_at__isnull=True).update(
+        completed_at=F("updated_at")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0003_task_completed_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:06
+
+from django.db import migrations
+
+from tasks.stats import rebuild_daily_stats
+
+
+def populate_daily_stats(apps, schema_editor):
+    rebuild_daily_stats(apps.get_model("tasks", "Task"), apps.get_model("tasks", "TaskDailyStats"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0006_taskdailystats"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_daily_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,4 @@
 from django.db import models
-from django.db import models
 from django.contrib.auth.models import User
 
 
@@ -22,10 +21,125 @@ class Task(models.Model):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
     due_date = models.DateTimeField(blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Task list, newest first
+            models.Index(fields=['user', '-created_at'], name='task_user_created_idx'),
+            # Status filters combined with due date ranges
+            models.Index(fields=['user', 'status', 'due_date'], name='task_user_status_due_idx'),
+            # Completion analytics by completion day
+            models.Index(fields=['user', 'completed_at'], name='task_user_completed_idx'),
+            # Incremental sync by last change
+            models.Index(fields=['user', 'updated_at'], name='task_user_updated_idx'),
+            # Calendar ranges regardless of status
+            models.Index(fields=['user', 'due_date'], name='task_user_due_idx'),
+            # Due date sweeps across all users only ever touch pending tasks
+            models.Index(
+                fields=['due_date'],
+                name='task_pending_due_idx',
+                condition=models.Q(status='pending'),
+            ),
+            # Pending tasks saved since the last sweep, across all users
+            models.Index(
+                fields=['updated_at'],
+                name='task_pending_updated_idx',
+                condition=models.Q(status='pending'),
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
 
+class TaskTombstone(models.Model):
+    """Record of a deleted task, so syncing clients can drop their copy"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_tombstones')
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted_at'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} deleted at {self.deleted_at}"
+
+
+class TaskDailyStats(models.Model):
+    """
+    Per-user, per-day rollup of the user's current tasks, kept up to date on
+    every task write so analytics read O(days) rows instead of O(tasks).
+
+    ``created`` and the priority/``created_completed`` counters describe the
+    tasks created on ``date``; ``completed`` counts tasks completed on it.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='task_daily_stats')
+    date = models.DateField()
+    created = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    created_completed = models.IntegerField(default=0)
+    high = models.IntegerField(default=0)
+    medium = models.IntegerField(default=0)
+    low = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Task daily stats"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='task_daily_stats_user_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} on {self.date}"
+
+
+class Notification(models.Model):
+    """A reminder that one of the user's pending tasks is due soon or overdue"""
+
+    KIND_CHOICES = [
+        ('due_soon', 'Due soon'),
+        ('overdue', 'Overdue'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Due date the reminder was raised for; moving the due date allows a new one
+    due_date = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+            # Unread counts only ever touch unread rows
+            models.Index(
+                fields=['user'],
+                name='notification_user_unread_idx',
+                condition=models.Q(read_at__isnull=True),
+            ),
+        ]
+        constraints = [
+            # Overlapping or repeated sweeps cannot notify twice
+            models.UniqueConstraint(fields=['task', 'kind', 'due_date'], name='notification_task_kind_due_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: task {self.task_id}"
+
+
+class NotificationSweep(models.Model):
+    """How far the scheduler has swept due dates, per notification kind"""
+
+    kind = models.CharField(max_length=10, choices=Notification.KIND_CHOICES, unique=True)
+    swept_until = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.kind} swept until {self.swept_until}"
@@ -0,0 +1,34 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """
+    Keyset pagination, newest first. The default page size is
+    TASK_PAGE_SIZE, read per request; ?page_size= overrides it.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_page_size(self, request):
+        self.page_size = getattr(settings, 'TASK_PAGE_SIZE', 50)
+        return super().get_page_size(request)
+
+
+class TaskCursorPagination(NewestFirstCursorPagination):
+    """
+    Keyset pagination for the task list.
+
+    Opt-in: requests without ``cursor`` or ``page_size`` still get the plain,
+    unpaginated list the templates expect.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not any(param in request.query_params for param in (self.cursor_query_param, self.page_size_query_param)):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class NotificationCursorPagination(NewestFirstCursorPagination):
+    """Keyset pagination for notifications; always on"""
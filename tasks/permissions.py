@@ -4,4 +4,5 @@ from rest_framework.permissions import BasePermission
 class IsOwner(BasePermission):
 
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
\ No newline at end of file
+        # Compare ids so the owner is not loaded just for the check
+        return obj.user_id == request.user.id
\ No newline at end of file
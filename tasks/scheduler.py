@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+
+from .models import Notification, NotificationSweep, Task
+
+
+def reminder_offsets():
+    """
+    How long before its due date a task crosses each notification threshold
+    """
+    return {
+        'due_soon': timedelta(minutes=getattr(settings, 'TASK_REMINDER_LEAD_MINUTES', 60)),
+        'overdue': timedelta(0),
+    }
+
+
+def pending_due_batches(start, end, batch_size):
+    """
+    Yield ``(queryset, last_due_date)`` for consecutive batches of at most
+    ``batch_size`` pending tasks due in [start, end], in (due date, id)
+    order. Each batch is a keyset range over the partial index on pending
+    due dates; only its boundary row is read into Python.
+    """
+    tasks = Task.objects.filter(status='pending', due_date__lte=end)
+    after = Q(due_date__gte=start)
+    while True:
+        boundary = list(
+            tasks.filter(after).order_by('due_date', 'id').values_list('id', 'due_date')[batch_size - 1:batch_size]
+        )
+        if not boundary:
+            yield tasks.filter(after), end
+            return
+        last_id, last_due = boundary[0]
+        batch = tasks.filter(after, due_date__lte=last_due).exclude(due_date=last_due, id__gt=last_id)
+        yield batch, last_due
+        after = Q(due_date__gte=last_due) & ~Q(due_date=last_due, id__lte=last_id)
+
+
+def _insert_notifications(tasks, kind, created_at):
+    """
+    Add a ``kind`` notification for each task in ``tasks`` with one
+    INSERT ... SELECT, skipping those that exist; returns how many were added
+    """
+    select, params = tasks.values_list('user_id', 'id', 'due_date').query.sql_with_params()
+    ops = connection.ops
+    columns = ', '.join(ops.quote_name(name) for name in ('user_id', 'task_id', 'due_date', 'kind', 'created_at'))
+    # WHERE keeps SQLite from reading ON CONFLICT as a join constraint
+    sql = (
+        f'{ops.insert_statement(on_conflict=OnConflict.IGNORE)} {ops.quote_name(Notification._meta.db_table)} '
+        f'({columns}) SELECT batch.*, %s, %s FROM ({select}) batch WHERE 1 = 1 '
+        f'{ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None)}'
+    )
+    created_at = Notification._meta.get_field('created_at').get_db_prep_value(created_at, connection)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, (kind, created_at, *params))
+        return cursor.rowcount
+
+
+def changed_into_swept(offset, previous, now):
+    """
+    Pending tasks created, rescheduled or reopened since the sweep that
+    reached ``previous``, with due dates it had already passed.
+    ``updated_at`` is set before the saving transaction commits, so the
+    window reaches back TASK_SCHEDULER_CHANGE_MARGIN seconds further.
+    """
+    margin = timedelta(seconds=getattr(settings, 'TASK_SCHEDULER_CHANGE_MARGIN', 60))
+    tasks = Task.objects.filter(status='pending', updated_at__gte=previous - offset - margin, due_date__lt=previous)
+    if offset:
+        tasks = tasks.filter(due_date__gte=now)
+    return tasks
+
+
+def _save_progress(kind, swept_until):
+    NotificationSweep.objects.update_or_create(kind=kind, defaults={'swept_until': swept_until})
+
+
+def sweep(now=None, batch_size=None):
+    """
+    Record a notification for every pending task that crossed a threshold
+    since the previous sweep, and return how many of each kind were added.
+
+    Each kind sweeps the due dates between where it stopped last time and
+    ``now`` plus its offset, one batch per transaction, saving its progress
+    as it goes. Rows are copied inside the database, so memory does not
+    depend on the number of tasks and no per-user queries are made. A sweep
+    that is interrupted or overlaps another repeats at most one batch; the
+    unique constraint on notifications drops the duplicates. The first
+    sweep reaches back TASK_SCHEDULER_CATCHUP_HOURS.
+
+    Tasks saved since the previous sweep with a due date it had already
+    passed, e.g. created half an hour before their due date or reopened
+    after it, are notified as well.
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or getattr(settings, 'TASK_SCHEDULER_BATCH_SIZE', 5000)
+    catchup = timedelta(hours=getattr(settings, 'TASK_SCHEDULER_CATCHUP_HOURS', 24))
+    swept = {state.kind: state.swept_until for state in NotificationSweep.objects.all()}
+
+    created = {}
+    for kind, offset in reminder_offsets().items():
+        end = now + offset
+        previous = swept.get(kind)
+        start = previous or end - catchup
+        if offset:
+            # A reminder for a task that is already overdue is pointless
+            start = max(start, now)
+
+        created[kind] = 0
+        if previous:
+            created[kind] += _insert_notifications(changed_into_swept(offset, previous, now), kind, now)
+        for tasks, swept_until in pending_due_batches(start, end, batch_size):
+            with transaction.atomic():
+                created[kind] += _insert_notifications(tasks, kind, now)
+                _save_progress(kind, swept_until)
+
+    return created
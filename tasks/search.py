@@ -0,0 +1,74 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Q, When
+
+
+FTS_TABLE = 'tasks_task_fts'
+
+
+def search_terms(query):
+    """Word tokens of a user query; punctuation and operators are dropped"""
+    return re.findall(r'\w+', query)
+
+
+def search_tasks(queryset, query, user):
+    """
+    Filter ``queryset`` (the user's tasks) to those whose title or
+    description match every word of ``query``, where the last letters of
+    each word may be missing, ordered by relevance. Returns the results and
+    whether matches were left out.
+
+    SQLite uses the FTS5 index and returns at most TASK_SEARCH_LIMIT best
+    matches among the tasks in ``queryset``, so other filters apply before
+    the limit; PostgreSQL uses a GIN-indexed tsvector; other backends fall
+    back to ``icontains``. Only SQLite results are ever truncated.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset.none(), False
+
+    if connection.vendor == 'sqlite':
+        # The owner column keeps the match inside the user's own tasks, so
+        # the index does all the work and ranking never sees other users
+        words = ' AND '.join(f'"{term}"*' for term in terms)
+        match = f'owner:u{user.id} AND {{title description}}: ({words})'
+        # Matches outside the queryset's filters are dropped before the limit
+        tasks_sql, tasks_params = queryset.order_by().values('id').query.sql_with_params()
+        limit = getattr(settings, 'TASK_SEARCH_LIMIT', 200)
+        with connection.cursor() as cursor:
+            # One more than the limit tells whether any match was left out
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({tasks_sql}) '
+                f'ORDER BY rank LIMIT %s',
+                [match, *tasks_params, limit + 1]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        truncated = len(ids) > limit
+        ids = ids[:limit]
+        if not ids:
+            return queryset.none(), False
+        return queryset.filter(id__in=ids).order_by(
+            Case(*[When(id=task_id, then=position) for position, task_id in enumerate(ids)])
+        ), truncated
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(' & '.join(f'{term}:*' for term in terms), config='english', search_type='raw')
+        return queryset.annotate(
+            search=search_vector(),
+            rank=SearchRank(search_vector(), search_query),
+        ).filter(search=search_query).order_by('-rank', '-created_at', '-id'), False
+
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    return queryset.order_by('-created_at', '-id'), False
+
+
+def search_vector():
+    """tsvector over title and description; must match the GIN index expression"""
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector('title', 'description', config='english')
@@ -1,14 +1,35 @@
-from rest_framework import serializers
+from datetime import timezone as dt_timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.utils import timezone
-from .models import Task
+from .models import Notification, Task
 import re
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer that takes an additional ``fields`` argument restricting
+    which of its fields are emitted
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class TaskSerializer(DynamicFieldsModelSerializer):
+    # Fields of the slim representation used by lists and dropdowns (?fields=slim)
+    SLIM_FIELDS = ['id', 'title', 'status', 'priority', 'due_date']
+
     class Meta:
         model = Task
-        fields = ['id', 'title', 'description', 'status', 'priority', 'due_date', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'description', 'status', 'priority', 'due_date', 'completed_at', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'completed_at', 'created_at', 'updated_at']
         extra_kwargs = {
             'title': {
                 'required': True,
@@ -128,4 +149,73 @@ class TaskSerializer(serializers.ModelSerializer):
         if 'status' not in attrs and not self.instance:
             attrs['status'] = 'pending'
         
+        # Record when the task transitions to completed, clear it when reopened
+        previous_status = self.instance.status if self.instance else None
+        if attrs.get('status') == 'completed' and previous_status != 'completed':
+            attrs['completed_at'] = timezone.now()
+        elif attrs.get('status') == 'pending':
+            attrs['completed_at'] = None
+        
         return attrs
+
+
+class TaskRowSerializer:
+    """
+    Read-only fast path for task lists: builds the same output as
+    TaskSerializer directly from ``values()`` rows, without instantiating
+    models or walking serializer fields per row
+    """
+    DATETIME_FIELDS = {'due_date', 'completed_at', 'created_at', 'updated_at'}
+
+    def __init__(self, fields=None):
+        self.fields = list(fields or TaskSerializer.Meta.fields)
+        format_datetime = self.datetime_formatter()
+        self.formatters = [
+            (name, format_datetime if name in self.DATETIME_FIELDS else None)
+            for name in self.fields
+        ]
+
+    @staticmethod
+    def datetime_formatter():
+        """
+        Equivalent of DRF's DateTimeField.to_representation with the output
+        format and timezone resolved once instead of on every value
+        """
+        output_format = api_settings.DATETIME_FORMAT
+        field_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        def format_datetime(value):
+            if output_format is None or isinstance(value, str):
+                return value
+            if field_timezone is not None:
+                if value.utcoffset() is not None:
+                    value = value.astimezone(field_timezone)
+                else:
+                    value = timezone.make_aware(value, field_timezone)
+            elif value.utcoffset() is not None:
+                value = timezone.make_naive(value, dt_timezone.utc)
+            if output_format.lower() == ISO_8601:
+                value = value.isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return value.strftime(output_format)
+
+        return format_datetime
+
+    def to_representation(self, row):
+        data = {}
+        for name, formatter in self.formatters:
+            value = row[name]
+            data[name] = formatter(value) if formatter is not None and value is not None else value
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    task_title = serializers.CharField(source='task.title', read_only=True)
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'task', 'task_title', 'kind', 'due_date', 'created_at', 'read_at']
+        read_only_fields = fields
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_user_version
+from .models import Task
+from .stats import apply_changes, task_state
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """
+    Any write to a task invalidates the owner's cached summaries, once it is
+    committed: a request recomputing them before then would cache the old
+    rows under the new version
+    """
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+@receiver(pre_save, sender=Task)
+def remember_stats_state(sender, instance, **kwargs):
+    """Load the stored row so post_save can apply only the difference"""
+    previous = None
+    if instance.pk:
+        previous = Task.objects.filter(pk=instance.pk).values(
+            'user_id', 'created_at', 'completed_at', 'priority', 'status'
+        ).first()
+    instance._stats_previous = previous
+
+
+@receiver(post_save, sender=Task)
+def update_daily_stats_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    apply_changes([(getattr(instance, '_stats_previous', None), task_state(instance))])
+
+
+@receiver(post_delete, sender=Task)
+def update_daily_stats_on_delete(sender, instance, origin=None, **kwargs):
+    # Deleting the account cascades to its stats rows as well
+    if isinstance(origin, User):
+        return
+    apply_changes([(task_state(instance), None)])
@@ -0,0 +1,113 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+STAT_FIELDS = ('created', 'completed', 'created_completed', 'high', 'medium', 'low')
+
+
+def task_state(task):
+    """The fields of a task that feed TaskDailyStats"""
+    return {
+        'user_id': task.user_id,
+        'created_at': task.created_at,
+        'completed_at': task.completed_at,
+        'priority': task.priority,
+        'status': task.status,
+    }
+
+
+def _contributions(state):
+    """(user_id, date, field) counters a task in ``state`` adds to the rollup"""
+    if state is None:
+        return []
+    created_on = timezone.localdate(state['created_at'])
+    keys = [
+        (state['user_id'], created_on, 'created'),
+        (state['user_id'], created_on, state['priority']),
+    ]
+    if state['status'] == 'completed':
+        keys.append((state['user_id'], created_on, 'created_completed'))
+    if state['completed_at']:
+        keys.append((state['user_id'], timezone.localdate(state['completed_at']), 'completed'))
+    return keys
+
+
+def apply_changes(changes):
+    """
+    Update TaskDailyStats for a batch of ``(old_state, new_state)`` pairs,
+    either of which may be None for creates/deletes. Deltas are netted per
+    (user, date) so each affected row is written once.
+    """
+    from .models import TaskDailyStats
+
+    deltas = defaultdict(lambda: defaultdict(int))
+    for old, new in changes:
+        for user_id, date, field in _contributions(old):
+            deltas[(user_id, date)][field] -= 1
+        for user_id, date, field in _contributions(new):
+            deltas[(user_id, date)][field] += 1
+
+    for (user_id, date), fields in deltas.items():
+        fields = {field: delta for field, delta in fields.items() if delta}
+        if not fields:
+            continue
+        increments = {field: F(field) + delta for field, delta in fields.items()}
+        rows = TaskDailyStats.objects.filter(user_id=user_id, date=date)
+        if rows.update(**increments) or all(delta < 0 for delta in fields.values()):
+            continue
+        try:
+            with transaction.atomic():
+                TaskDailyStats.objects.create(user_id=user_id, date=date, **fields)
+        except IntegrityError:
+            # Another writer created the row first
+            rows.update(**increments)
+
+
+def rebuild_daily_stats(Task, TaskDailyStats, user_ids=None, batch_size=1000):
+    """
+    Recompute TaskDailyStats from the task table with two grouped queries.
+    Takes the model classes so data migrations can pass historical models.
+    """
+    tasks = Task.objects.all()
+    stats = TaskDailyStats.objects.all()
+    if user_ids is not None:
+        tasks = tasks.filter(user_id__in=user_ids)
+        stats = stats.filter(user_id__in=user_ids)
+
+    rows = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    by_created = (
+        tasks.annotate(date=TruncDate('created_at'))
+        .values('user_id', 'date')
+        .annotate(
+            created=Count('id'),
+            created_completed=Count('id', filter=Q(status='completed')),
+            high=Count('id', filter=Q(priority='high')),
+            medium=Count('id', filter=Q(priority='medium')),
+            low=Count('id', filter=Q(priority='low')),
+        )
+        .order_by()
+    )
+    for row in by_created:
+        rows[(row.pop('user_id'), row.pop('date'))].update(row)
+
+    by_completed = (
+        tasks.filter(completed_at__isnull=False)
+        .annotate(date=TruncDate('completed_at'))
+        .values('user_id', 'date')
+        .annotate(completed=Count('id'))
+        .order_by()
+    )
+    for row in by_completed:
+        rows[(row['user_id'], row['date'])]['completed'] = row['completed']
+
+    with transaction.atomic():
+        stats.delete()
+        TaskDailyStats.objects.bulk_create(
+            [TaskDailyStats(user_id=user_id, date=date, **counts) for (user_id, date), counts in rows.items()],
+            batch_size=batch_size,
+        )
+    return len(rows)
@@ -0,0 +1,53 @@
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import TaskTombstone
+
+
+def tombstone_horizon():
+    """Oldest point in time tombstones are still kept for"""
+    days = getattr(settings, 'TASK_TOMBSTONE_RETENTION_DAYS', 30)
+    return timezone.now() - timedelta(days=days)
+
+
+def next_cursor():
+    """
+    Cursor for the end of a sync response. ``updated_at`` and ``deleted_at``
+    are set before their transaction commits, so a write stamped just before
+    now may only become visible after this read; the cursor lags by
+    TASK_SYNC_CURSOR_MARGIN seconds to send such writes next time. Changes
+    in that margin are sent twice; clients apply them by id.
+    """
+    return timezone.now() - timedelta(seconds=getattr(settings, 'TASK_SYNC_CURSOR_MARGIN', 10))
+
+
+def record_deletions(user, task_ids):
+    """Leave a tombstone for each deleted task id"""
+    TaskTombstone.objects.bulk_create([
+        TaskTombstone(user=user, task_id=task_id) for task_id in task_ids
+    ])
+
+
+def prune_tombstones():
+    """Delete tombstones older than the retention period, returning how many"""
+    deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=tombstone_horizon()).delete()
+    return deleted
+
+
+def format_cursor(moment):
+    """Sync cursor for a point in time; UTC with a Z suffix so it is URL safe"""
+    return moment.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def parse_cursor(value):
+    """Aware datetime for a sync cursor, or None if it is missing or malformed"""
+    try:
+        since = parse_datetime(value) if value else None
+    except ValueError:
+        return None
+    if since is not None and timezone.is_naive(since):
+        return None
+    return since
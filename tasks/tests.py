@@ -1,3 +1,869 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.preferences import get_preferences
+from . import async_views
+from .aggregates import aggregate_counts, daily_counts, status_conditions
+from .events import RESYNC, LocalBroker, get_broker
+from .models import Notification, Task, TaskDailyStats, TaskTombstone
+from .scheduler import sweep
+from .serializers import TaskSerializer
+from .stats import STAT_FIELDS, rebuild_daily_stats
+
+
+class TaskAPITestCase(TestCase):
+    """Authenticated API client plus a small spread of tasks"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        now = timezone.now()
+        for i in range(6):
+            Task.objects.create(
+                user=self.user,
+                title=f'Task {i}',
+                status='completed' if i % 2 else 'pending',
+                priority=['low', 'medium', 'high'][i % 3],
+                due_date=now + timedelta(days=i - 3),
+                completed_at=now if i % 2 else None,
+            )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class TaskIndexUsageTests(TaskAPITestCase):
+
+    def query_plans(self, url, table='tasks_task'):
+        """Run a view and return the EXPLAIN QUERY PLAN details of each query on ``table``"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        for query in ctx.captured_queries:
+            if f'"{table}"' not in query['sql']:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                plans.append(' '.join(row[-1] for row in cursor.fetchall()))
+        self.assertTrue(plans, f'{url} ran no queries on {table}')
+        return plans
+
+    def assertUsesIndex(self, url, index_name, table='tasks_task'):
+        plans = self.query_plans(url, table)
+        self.assertTrue(
+            any(index_name in plan for plan in plans),
+            f'{url} did not use {index_name}: {plans}'
+        )
+
+    def test_views_never_scan_task_table(self):
+        urls = [
+            '/api/tasks/',
+            '/api/tasks/?status=pending',
+            '/api/tasks/?overdue=true',
+            '/api/tasks/?upcoming=true',
+            '/api/tasks/summary/',
+            '/api/tasks/summary/?period=month&year=2026&month=1',
+            '/api/tasks/analytics/',
+            '/api/tasks/calendar/',
+            '/api/tasks/daily-summary/',
+        ]
+        for url in urls:
+            for plan in self.query_plans(url):
+                self.assertIn('SEARCH tasks_task USING', plan, f'{url} scans tasks_task: {plan}')
+
+    def test_task_list_uses_created_index(self):
+        self.assertUsesIndex('/api/tasks/', 'task_user_created_idx')
+
+    def test_status_due_filters_use_status_due_index(self):
+        self.assertUsesIndex('/api/tasks/?overdue=true', 'task_user_status_due_idx')
+        self.assertUsesIndex('/api/tasks/?upcoming=true', 'task_user_status_due_idx')
+
+    def test_rollup_reads_search_by_user(self):
+        for url in ['/api/tasks/analytics/', '/api/tasks/daily-summary/']:
+            for plan in self.query_plans(url, 'tasks_taskdailystats'):
+                self.assertIn('SEARCH tasks_taskdailystats USING', plan)
+                self.assertIn('user_id=?', plan)
+
+    def test_calendar_uses_due_index(self):
+        self.assertUsesIndex('/api/tasks/calendar/', 'task_user_due_idx')
+
+
+class TaskCompletionTrackingTests(TaskAPITestCase):
+
+    def test_completed_at_follows_status_transitions(self):
+        task = Task.objects.filter(user=self.user, status='pending').first()
+        url = f'/api/tasks/{task.id}/'
+
+        self.client.patch(url, {'status': 'completed'}, format='json')
+        task.refresh_from_db()
+        completed_at = task.completed_at
+        self.assertIsNotNone(completed_at)
+
+        # Editing a completed task keeps its completion time
+        self.client.patch(url, {'title': 'Renamed task', 'status': 'completed'}, format='json')
+        task.refresh_from_db()
+        self.assertEqual(task.completed_at, completed_at)
+
+        self.client.patch(url, {'status': 'pending'}, format='json')
+        task.refresh_from_db()
+        self.assertIsNone(task.completed_at)
+
+
+class TaskCursorPaginationTests(TaskAPITestCase):
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get('/api/tasks/')
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 6)
+
+    @override_settings(TASK_PAGE_SIZE=4)
+    def test_default_page_size_follows_settings(self):
+        first = self.client.get('/api/tasks/?cursor=').json()
+        self.assertEqual(len(first['results']), 4)
+        self.assertEqual(len(self.client.get(first['next']).json()['results']), 2)
+
+    def test_pages_are_stable_under_inserts(self):
+        first = self.client.get('/api/tasks/?page_size=4').json()
+        self.assertEqual(len(first['results']), 4)
+
+        # A task created between page loads must not shift the next page
+        Task.objects.create(user=self.user, title='Newest task')
+        second = self.client.get(first['next']).json()
+
+        seen = [task['id'] for task in first['results'] + second['results']]
+        expected = list(
+            Task.objects.filter(user=self.user)
+            .exclude(title='Newest task')
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertIsNone(second['next'])
+
+
+class TaskSummaryCacheTests(TaskAPITestCase):
+
+    def test_summary_is_cached_until_a_task_changes(self):
+        first = self.client.get('/api/tasks/summary/').json()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/tasks/summary/').json(), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(user=self.user, title='Another task')
+        self.assertEqual(self.client.get('/api/tasks/summary/').json()['total_tasks'], first['total_tasks'] + 1)
+
+    def test_uncommitted_writes_leave_the_cache_alone(self):
+        first = self.client.get('/api/tasks/summary/').json()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Task.objects.create(user=self.user, title='Another task')
+            # The version only moves once the write commits
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get('/api/tasks/summary/').json(), first)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_cache_is_keyed_by_query_parameters(self):
+        self.client.get('/api/tasks/analytics/?days=7')
+        response = self.client.get('/api/tasks/analytics/?days=30')
+        self.assertEqual(len(response.json()['weekly_performance']), 30)
+
+
+class TaskBulkTests(TaskAPITestCase):
+
+    def test_bulk_create_update_delete(self):
+        pending = list(Task.objects.filter(user=self.user, status='pending').values_list('id', flat=True))
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tasks/bulk/', {
+                'create': [{'title': 'Bulk one'}, {'title': 'Bulk two', 'priority': 'high'}],
+                'update': [{'id': pending[0], 'status': 'completed'}],
+                'delete': pending[1:],
+            }, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['created']), 2)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 6 + 2 - len(pending[1:]))
+        completed = Task.objects.get(id=pending[0])
+        self.assertEqual(completed.status, 'completed')
+        self.assertIsNotNone(completed.completed_at)
+
+    def test_any_invalid_item_rejects_the_whole_request(self):
+        other = User.objects.create_user('bob', 'bob@example.com', 'secret123')
+        foreign = Task.objects.create(user=other, title='Not yours')
+
+        response = self.client.post('/api/tasks/bulk/', {
+            'create': [{'title': 'Fine task'}, {'title': ''}],
+            'delete': [foreign.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        details = response.json()['details']
+        self.assertEqual(details['create'][0], {})
+        self.assertIn('title', details['create'][1])
+        self.assertIn('id', details['delete'][0])
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 6)
+        self.assertTrue(Task.objects.filter(id=foreign.id).exists())
+
+    def test_malformed_ids_are_item_errors(self):
+        task = Task.objects.filter(user=self.user).first()
+        response = self.client.post('/api/tasks/bulk/', {
+            'update': [{'id': [task.id], 'title': 'Renamed'}, {'id': {'pk': task.id}}],
+            'delete': [[task.id], {'id': task.id}, True],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        details = response.json()['details']
+        self.assertEqual(details['update'], [{'id': 'Task not found.'}] * 2)
+        self.assertEqual(details['delete'], [{'id': 'Task not found.'}] * 3)
+        self.assertEqual(Task.objects.filter(user=self.user).count(), 6)
+
+    def test_body_must_be_an_object(self):
+        for body in ([], 'create', 3):
+            with self.subTest(body=body):
+                response = self.client.post('/api/tasks/bulk/', body, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['details'], 'Expected an object')
+
+    def test_repeated_delete_ids_count_once(self):
+        task = Task.objects.filter(user=self.user).first()
+        response = self.client.post('/api/tasks/bulk/', {'delete': [task.id, task.id]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['deleted'], [task.id])
+        self.assertEqual(TaskTombstone.objects.filter(task_id=task.id).count(), 1)
+
+
+class TaskConditionalGetTests(TaskAPITestCase):
+
+    def test_list_returns_not_modified_until_tasks_change(self):
+        etag = self.client.get('/api/tasks/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Task.objects.filter(user=self.user).first().delete()
+        response = self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_depends_on_query_string(self):
+        etag = self.client.get('/api/tasks/calendar/')['ETag']
+        response = self.client.get('/api/tasks/calendar/?counts=true', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_follows_the_clock(self):
+        self.assertFalse(self.client.get('/api/tasks/?overdue=true').has_header('ETag'))
+
+        etag = self.client.get('/api/tasks/calendar/')['ETag']
+        self.assertEqual(self.client.get('/api/tasks/calendar/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with mock.patch('tasks.conditional.timezone.localdate', return_value=timezone.localdate() + timedelta(days=40)):
+            response = self.client.get('/api/tasks/calendar/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_honours_etag_and_last_modified(self):
+        task = Task.objects.filter(user=self.user).first()
+        url = f'/api/tasks/{task.id}/'
+        response = self.client.get(url)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+        self.client.patch(url, {'priority': 'high'}, format='json')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_detail_etag_depends_on_fieldset(self):
+        task = Task.objects.filter(user=self.user).first()
+        url = f'/api/tasks/{task.id}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(f'{url}?fields=title', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'title': task.title})
+
+
+class TaskAggregateTests(TaskAPITestCase):
+    """The base tasks are due at now - 3 days ... now + 2 days, odd ones completed"""
+
+    def test_status_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            counts = aggregate_counts(Task.objects.filter(user=self.user), **status_conditions())
+        self.assertEqual(counts, {'total': 6, 'completed': 3, 'pending': 3, 'overdue': 2})
+
+    def test_summary_counts(self):
+        data = self.client.get('/api/tasks/summary/').json()
+        self.assertEqual(
+            {name: data[name] for name in ('total_tasks', 'completed_tasks', 'pending_tasks', 'overdue_tasks')},
+            {'total_tasks': 6, 'completed_tasks': 3, 'pending_tasks': 3, 'overdue_tasks': 2}
+        )
+        # Due by now: the three past tasks and the one due at setup
+        self.assertEqual((data['tasks_due'], data['completed_due'], data['pending_due']), (4, 2, 2))
+        self.assertEqual(data['completion_rate'], 50.0)
+
+    def test_summary_periods(self):
+        for day, task_status in [(10, 'completed'), (20, 'pending'), (28, 'pending')]:
+            Task.objects.create(user=self.user, title=f'February {day}', status=task_status,
+                                due_date=timezone.make_aware(datetime(2025, 2, day, 12)))
+
+        month = self.client.get('/api/tasks/summary/?period=month&year=2025&month=2').json()
+        self.assertEqual((month['tasks_due'], month['completed_due'], month['pending_due']), (3, 1, 2))
+        self.assertEqual((month['completion_rate'], month['period_label']), (33.3, 'February 2025'))
+        self.assertEqual(month['total_tasks'], 9)
+
+        # ISO week 7 of 2025 runs from February 10 to 16
+        week = self.client.get('/api/tasks/summary/?period=week&year=2025&week=7').json()
+        self.assertEqual((week['tasks_due'], week['completion_rate'], week['period_label']), (1, 100.0, 'Week 7'))
+
+    def test_daily_counts_by_day(self):
+        today = timezone.localdate()
+        counts = daily_counts(Task.objects.filter(user=self.user), 'due_date', today - timedelta(days=1))
+        self.assertEqual(sorted(counts), [today + timedelta(days=i) for i in range(-1, 3)])
+        self.assertEqual(set(counts.values()), {1})
+
+    def test_analytics_windows(self):
+        today = timezone.localdate()
+        for days in (7, 30, 90):
+            with self.subTest(days=days):
+                series = self.client.get(f'/api/tasks/analytics/?days={days}').json()['weekly_performance']
+                self.assertEqual(len(series), days)
+                self.assertEqual(series[0]['date'], (today - timedelta(days=days - 1)).isoformat())
+                # Every task was created and completed today; earlier days are zero-filled
+                self.assertEqual(series[-1], {'date': today.isoformat(), 'completed': 3, 'created': 6})
+                self.assertTrue(all(day['completed'] == day['created'] == 0 for day in series[:-1]))
+
+    def test_analytics_rejects_other_windows(self):
+        for days in ('14', '0', 'week'):
+            with self.subTest(days=days):
+                response = self.client.get(f'/api/tasks/analytics/?days={days}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Invalid window')
+
+
+class TaskCalendarTests(TaskAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        for title, due in [('First', '2025-02-01 00:00'), ('Last', '2025-02-28 23:45'), ('Next', '2025-03-01 00:00')]:
+            Task.objects.create(
+                user=self.user, title=title, due_date=timezone.make_aware(datetime.fromisoformat(due))
+            )
+
+    def titles_by_date(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return {day: [task['title'] for task in tasks] for day, tasks in response.json()['tasks_by_date'].items()}
+
+    def test_month_includes_its_last_evening(self):
+        self.assertEqual(self.titles_by_date('/api/tasks/calendar/?year=2025&month=2'), {
+            '2025-02-01': ['First'], '2025-02-28': ['Last']
+        })
+
+    def test_range_is_half_open(self):
+        self.assertEqual(self.titles_by_date('/api/tasks/calendar/?start=2025-02-28&end=2025-03-01'), {
+            '2025-02-28': ['Last']
+        })
+        self.assertEqual(self.titles_by_date('/api/tasks/calendar/?start=2025-03-01&end=2025-03-02'), {
+            '2025-03-01': ['Next']
+        })
+
+    def test_invalid_ranges(self):
+        for query in ['start=2025-03-01&end=2025-02-01', 'start=2025-02-01&end=2025-02-01', 'start=2025-02-01',
+                      'start=2024-01-01&end=2025-06-01', 'month=13', 'year=abc']:
+            with self.subTest(query=query):
+                response = self.client.get(f'/api/tasks/calendar/?{query}')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Invalid date range')
+
+    def test_counts(self):
+        response = self.client.get('/api/tasks/calendar/?start=2025-02-01&end=2025-03-02&counts=true')
+        self.assertEqual(response.json(), {
+            'start': '2025-02-01',
+            'end': '2025-03-02',
+            'counts_by_date': {'2025-02-01': 1, '2025-02-28': 1, '2025-03-01': 1},
+        })
+
+
+class TaskChangesTests(TaskAPITestCase):
+
+    @override_settings(TASK_SYNC_CURSOR_MARGIN=0)
+    def test_changes_since_cursor_include_updates_and_deletions(self):
+        initial = self.client.get('/api/tasks/changes/').json()
+        self.assertTrue(initial['full'])
+        self.assertEqual(len(initial['changed']), 6)
+
+        edited, deleted = Task.objects.filter(user=self.user)[:2]
+        self.client.patch(f'/api/tasks/{edited.id}/', {'priority': 'high'}, format='json')
+        self.client.delete(f'/api/tasks/{deleted.id}/')
+
+        changes = self.client.get('/api/tasks/changes/', {'since': initial['cursor']}).json()
+        self.assertFalse(changes['full'])
+        self.assertEqual([task['id'] for task in changes['changed']], [edited.id])
+        self.assertEqual(changes['deleted'], [deleted.id])
+
+        latest = self.client.get('/api/tasks/changes/', {'since': changes['cursor']}).json()
+        self.assertEqual((latest['changed'], latest['deleted']), ([], []))
+
+    def test_writes_committed_after_the_read_are_sent(self):
+        initial = self.client.get('/api/tasks/changes/').json()
+        # Stamped before the cursor was taken, but committed after the read
+        task = Task.objects.filter(user=self.user).first()
+        Task.objects.filter(pk=task.pk).update(title='Late', updated_at=timezone.now() - timedelta(seconds=1))
+
+        changes = self.client.get('/api/tasks/changes/', {'since': initial['cursor']}).json()
+        self.assertIn(task.id, [item['id'] for item in changes['changed']])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/tasks/changes/?since=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskDailyStatsTests(TaskAPITestCase):
+
+    def stats_snapshot(self):
+        return sorted(
+            TaskDailyStats.objects.filter(user=self.user)
+            .exclude(**dict.fromkeys(STAT_FIELDS, 0))
+            .values_list('date', *STAT_FIELDS)
+        )
+
+    def test_rollup_matches_rebuild_after_writes(self):
+        tasks = list(Task.objects.filter(user=self.user, status='pending'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/tasks/{tasks[0].id}/', {'status': 'completed', 'priority': 'high'}, format='json')
+            self.client.delete(f'/api/tasks/{tasks[1].id}/')
+            self.client.post('/api/tasks/bulk/', {
+                'create': [{'title': 'Bulk task', 'priority': 'low'}],
+                'update': [{'id': tasks[2].id, 'status': 'completed'}],
+            }, format='json')
+
+        incremental = self.stats_snapshot()
+        rebuild_daily_stats(Task, TaskDailyStats, user_ids=[self.user.id])
+        self.assertEqual(incremental, self.stats_snapshot())
+
+    def test_analytics_reads_from_rollup(self):
+        response = self.client.get('/api/tasks/analytics/').json()
+        self.assertEqual(response['status_distribution'], {'completed': 3, 'pending': 3})
+        self.assertEqual(response['weekly_performance'][-1]['created'], 6)
+        self.assertEqual(response['weekly_performance'][-1]['completed'], 3)
+
+    def test_deleting_account_removes_rollup(self):
+        self.user.delete()
+        self.assertFalse(TaskDailyStats.objects.exists())
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Exercises the SQLite FTS5 index')
+class TaskSearchTests(TaskAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        Task.objects.create(user=self.user, title='Quarterly report', description='Draft the finance summary')
+        Task.objects.create(user=self.user, title='Finance review', description='Report numbers to the board')
+        other = User.objects.create_user('bob', 'bob@example.com', 'secret123')
+        Task.objects.create(user=other, title='Finance report for bob')
+
+    def search(self, q):
+        return [task['title'] for task in self.client.get('/api/tasks/', {'q': q}).json()]
+
+    def test_matches_all_words_by_prefix(self):
+        self.assertEqual(sorted(self.search('financ rep')), ['Finance review', 'Quarterly report'])
+        self.assertEqual(self.search('quarter'), ['Quarterly report'])
+
+    def test_index_follows_edits_and_deletes(self):
+        task = Task.objects.get(title='Quarterly report')
+        self.client.patch(f'/api/tasks/{task.id}/', {'title': 'Yearly plan'}, format='json')
+        self.assertEqual(self.search('quarterly'), [])
+        self.assertEqual(self.search('yearly'), ['Yearly plan'])
+
+        task.delete()
+        self.assertEqual(self.search('yearly'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"finance" OR NOT *'), self.search('finance or not'))
+
+    @override_settings(TASK_SEARCH_LIMIT=1)
+    def test_filters_apply_before_the_limit(self):
+        Task.objects.filter(title='Finance review').update(status='completed')
+        for task_status, title in [('pending', 'Quarterly report'), ('completed', 'Finance review')]:
+            with self.subTest(status=task_status):
+                response = self.client.get('/api/tasks/', {'q': 'finance', 'status': task_status})
+                self.assertEqual([task['title'] for task in response.json()], [title])
+
+    def test_owner_column_is_not_searched(self):
+        self.assertEqual(self.search(f'u{self.user.id}'), [])
+
+    @override_settings(TASK_SEARCH_LIMIT=1)
+    def test_truncation_is_reported(self):
+        for url in ('/api/tasks/', '/api/tasks/export/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, {'q': 'finance'})['X-Search-Truncated'], 'true')
+                self.assertEqual(self.client.get(url, {'q': 'quarterly'})['X-Search-Truncated'], 'false')
+        self.assertFalse(self.client.get('/api/tasks/').has_header('X-Search-Truncated'))
+
+    def test_results_are_not_paginated(self):
+        for params in ({'cursor': ''}, {'page_size': 1}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/tasks/', {'q': 'finance', **params})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['error'], 'Invalid search')
+
+
+class TaskSparseFieldsetTests(TaskAPITestCase):
+
+    def test_fields_limit_output_and_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tasks/?fields=slim')
+        self.assertEqual(set(response.json()[0]), {'id', 'title', 'status', 'priority', 'due_date'})
+        self.assertFalse(any('"description"' in query['sql'] for query in ctx.captured_queries))
+
+    def test_exclude_on_detail(self):
+        task = Task.objects.filter(user=self.user).first()
+        response = self.client.get(f'/api/tasks/{task.id}/?exclude=description,updated_at')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('description', response.json())
+        self.assertIn('title', response.json())
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/api/tasks/?fields=id,secret')
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskRowSerializerTests(TaskAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        Task.objects.create(user=self.user, title='No description or due date', description=None)
+        Task.objects.create(user=self.user, title='Blank description', description='', status='completed',
+                            completed_at=timezone.now())
+
+    def assertSameBytes(self, url, fields=None):
+        queryset = Task.objects.filter(user=self.user).order_by('-created_at', '-id')
+        expected = JSONRenderer().render(TaskSerializer(queryset, many=True, fields=fields).data)
+        self.assertEqual(self.client.get(url).content, expected)
+
+    def test_list_matches_task_serializer_byte_for_byte(self):
+        self.assertSameBytes('/api/tasks/')
+
+    def test_fieldsets_match_task_serializer(self):
+        self.assertSameBytes('/api/tasks/?fields=slim', TaskSerializer.SLIM_FIELDS)
+        self.assertSameBytes('/api/tasks/?fields=title,completed_at,updated_at', ['title', 'completed_at', 'updated_at'])
+
+    @override_settings(TIME_ZONE='America/New_York')
+    def test_datetimes_use_current_timezone(self):
+        self.assertSameBytes('/api/tasks/')
+
+    def test_paginated_list_uses_rows(self):
+        response = self.client.get('/api/tasks/?page_size=3').json()
+        queryset = Task.objects.filter(user=self.user).order_by('-created_at', '-id')[:3]
+        self.assertEqual(response['results'], TaskSerializer(queryset, many=True).data)
+
+
+class TaskExportTests(TaskAPITestCase):
+
+    def export(self, query):
+        response = self.client.get(f'/api/tasks/export/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_matches_list(self):
+        lines = self.export('format=ndjson&status=pending').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.client.get('/api/tasks/?status=pending').json())
+
+    def test_json_and_csv(self):
+        self.assertEqual(json.loads(self.export('format=json')), self.client.get('/api/tasks/').json())
+        self.assertEqual(json.loads(self.export('format=json&status=archived')), [])
+        rows = list(csv.reader(io.StringIO(self.export('format=csv&fields=id,title,due_date'))))
+        self.assertEqual(rows[0], ['id', 'title', 'due_date'])
+        self.assertEqual(len(rows), 7)
+
+    def test_invalid_format(self):
+        self.assertEqual(self.client.get('/api/tasks/export/?format=xml').status_code, 400)
+
+
+class TaskImportTests(TaskAPITestCase):
+
+    def test_ndjson_body_in_batches(self):
+        lines = [json.dumps({'title': f'Imported {i}', 'priority': 'high'}) for i in range(5)]
+        lines.insert(2, '{"title": ""}')
+        lines.insert(4, 'not json')
+        with self.settings(TASK_IMPORT_BATCH_SIZE=2):
+            response = self.client.post('/api/tasks/import/', '\n'.join(lines), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['imported'], response.data['failed']), (5, 2))
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 5])
+        self.assertEqual(Task.objects.filter(user=self.user, title__startswith='Imported').count(), 5)
+        stats = TaskDailyStats.objects.get(user=self.user, date=timezone.localdate())
+        self.assertEqual(stats.high, Task.objects.filter(user=self.user, priority='high').count())
+
+    def test_csv_export_round_trip(self):
+        exported = b''.join(self.client.get('/api/tasks/export/?format=csv&fields=title,description,status').streaming_content)
+        upload = SimpleUploadedFile('tasks.csv', exported)
+        response = self.client.post('/api/tasks/import/', {'file': upload})
+        self.assertEqual((response.data['imported'], response.data['failed']), (6, 0))
+        self.assertEqual(Task.objects.filter(user=self.user, status='completed').count(), 6)
+
+    def test_unreadable_input_reports_what_was_kept(self):
+        lines = [json.dumps({'title': f'Imported {i}'}).encode() for i in range(3)]
+        body = b'\n'.join([*lines, b'{"title": "\xff"}', lines[0]])
+        with self.settings(TASK_IMPORT_BATCH_SIZE=2):
+            response = self.client.post('/api/tasks/import/', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual((response.data['imported'], response.data['stopped']['line']), (3, 4))
+        self.assertEqual(Task.objects.filter(user=self.user, title__startswith='Imported').count(), 3)
+
+        upload = SimpleUploadedFile('tasks.csv', b'title\nFirst\nSecond\n\xff\n')
+        response = self.client.post('/api/tasks/import/', {'file': upload})
+        self.assertEqual((response.data['imported'], response.data['stopped']['line']), (2, 4))
+
+    def test_unknown_format(self):
+        response = self.client.post('/api/tasks/import/', {'file': SimpleUploadedFile('tasks.xml', b'<tasks/>')})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class TaskAsyncViewTests(TaskAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    async def test_payloads_match_sync_views(self):
+        task = await Task.objects.filter(user=self.user).afirst()
+        cases = [
+            (async_views.AsyncTaskListView, '/api/tasks/?status=pending&fields=slim', {}),
+            (async_views.AsyncTaskDetailView, f'/api/tasks/{task.pk}/', {'pk': task.pk}),
+            (async_views.AsyncTaskSummaryView, '/api/tasks/summary/', {}),
+            (async_views.AsyncTaskAnalyticsView, '/api/tasks/analytics/?days=30', {}),
+            (async_views.AsyncTaskCalendarView, '/api/tasks/calendar/', {}),
+            (async_views.AsyncTaskCalendarView, '/api/tasks/calendar/?counts=true', {}),
+            (async_views.AsyncDailySummaryView, '/api/tasks/daily-summary/', {}),
+        ]
+        for view, url, kwargs in cases:
+            with self.subTest(url=url):
+                response = await view.as_view()(self.factory.get(url, headers=self.headers), **kwargs)
+                expected = await sync_to_async(self.client.get)(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.content), expected.json())
+
+    @override_settings(TIME_ZONE='Pacific/Kiritimati')
+    async def test_daily_summary_uses_the_local_date(self):
+        # 20:00 UTC on March 10 is already March 11 at UTC+14
+        now = datetime(2025, 3, 10, 20, tzinfo=dt_timezone.utc)
+        await Task.objects.acreate(user=self.user, title='Due this morning', due_date=now + timedelta(hours=1))
+        request = self.factory.get('/api/tasks/daily-summary/', headers=self.headers)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            async_data = json.loads((await async_views.AsyncDailySummaryView.as_view()(request)).content)
+            # Not from the summary the async view cached
+            await sync_to_async(cache.clear)()
+            sync_data = (await sync_to_async(self.client.get)('/api/tasks/daily-summary/')).json()
+        for data in (async_data, sync_data):
+            self.assertEqual((data['date'], data['summary']['tasks_due_today']), ('March 11, 2025', 1))
+
+    async def test_conditional_get_and_authentication(self):
+        view = async_views.AsyncTaskListView.as_view()
+        response = await view(self.factory.get('/api/tasks/', headers=self.headers))
+        headers = {**self.headers, 'If-None-Match': response['ETag']}
+        self.assertEqual((await view(self.factory.get('/api/tasks/', headers=headers))).status_code, 304)
+        self.assertEqual((await view(self.factory.get('/api/tasks/'))).status_code, 401)
+
+    async def test_writes_fall_back_to_sync_view(self):
+        request = self.factory.post('/api/tasks/', {'title': 'Async create'}, content_type='application/json',
+                                    headers=self.headers)
+        response = await async_views.AsyncTaskListView.as_view()(request)
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await Task.objects.filter(user=self.user, title='Async create').aexists())
+
+
+class DashboardTests(TaskAPITestCase):
+
+    @override_settings(PREFERENCES_CACHE_ALIAS='default')
+    def test_sections_match_their_endpoints(self):
+        # As in production, where each request gets a copy of the user
+        # without its preferences loaded, and those are cached already
+        get_preferences(User.objects.get(pk=self.user.pk))
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+        with self.assertNumQueries(4):
+            data = self.client.get('/api/dashboard/?period=total').json()
+        self.assertEqual(list(data), ['profile', 'preferences', 'summary', 'daily_summary', 'tasks'])
+        self.assertEqual(data['summary'], self.client.get('/api/tasks/summary/?period=total').json())
+        self.assertEqual(data['profile'], self.client.get('/api/auth/profile/').json())
+        self.assertEqual(data['preferences'], self.client.get('/api/auth/preferences/').json())
+
+        daily = self.client.get('/api/tasks/daily-summary/').json()
+        self.assertEqual(data['daily_summary']['summary'], daily['summary'])
+        for name in ('tasks_today', 'tasks_tomorrow', 'overdue_tasks'):
+            self.assertCountEqual(data['daily_summary'][name], daily[name])
+
+        for section, query in [('overdue', 'overdue=true'), ('upcoming', 'upcoming=true')]:
+            expected = self.client.get(f'/api/tasks/?{query}&status=pending&fields=slim').json()
+            self.assertEqual(data['tasks'][section], expected[:5])
+
+    def test_include(self):
+        with self.assertNumQueries(1):
+            data = self.client.get('/api/dashboard/?include=summary').json()
+        self.assertEqual(list(data), ['summary'])
+        self.assertEqual(self.client.get('/api/dashboard/?include=summary,calendar').status_code, 400)
+
+
+class NotificationSchedulerTests(TaskAPITestCase):
+    """The base tasks are due at now - 3 days ... now + 2 days, odd ones completed"""
+
+    # The base tasks were created just before the first sweep, which left
+    # the overdue ones outside its catch-up period
+    @override_settings(TASK_SCHEDULER_CHANGE_MARGIN=0)
+    def test_sweeps_notify_each_crossing_once(self):
+        now = timezone.now()
+        # Several tasks sharing a due date straddle the batch boundaries
+        for i in range(5):
+            Task.objects.create(user=self.user, title=f'Tied {i}', due_date=now + timedelta(minutes=30))
+
+        self.assertEqual(sweep(now=now, batch_size=2), {'due_soon': 5, 'overdue': 0})
+        # Nothing new crossed; a repeat never duplicates
+        self.assertEqual(sweep(now=now, batch_size=2)['due_soon'], 0)
+        self.assertEqual(Notification.objects.filter(kind='due_soon').count(), 5)
+
+        # A day later the tied tasks and the pending task due in a day are overdue
+        sweep(now=now + timedelta(days=1, minutes=1), batch_size=2)
+        self.assertEqual(Notification.objects.filter(kind='overdue').count(), 6)
+        self.assertFalse(Notification.objects.filter(task__status='completed').exists())
+
+    def test_tasks_saved_into_the_swept_window(self):
+        Task.objects.all().delete()
+        now = timezone.now()
+        sweep(now=now)
+        # Due before the next sweep's window starts
+        created = Task.objects.create(user=self.user, title='Soon', due_date=now + timedelta(minutes=30))
+        reopened = Task.objects.create(user=self.user, title='Late', status='completed', due_date=now - timedelta(days=5))
+        reopened.status = 'pending'
+        reopened.save()
+
+        self.assertEqual(sweep(now=now + timedelta(minutes=1)), {'due_soon': 1, 'overdue': 1})
+        self.assertTrue(Notification.objects.filter(task=created, kind='due_soon').exists())
+        self.assertTrue(Notification.objects.filter(task=reopened, kind='overdue').exists())
+        self.assertEqual(sweep(now=now + timedelta(minutes=2)), {'due_soon': 0, 'overdue': 0})
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+    def test_sweep_uses_pending_due_index(self):
+        with CaptureQueriesContext(connection) as ctx:
+            sweep(now=timezone.now() + timedelta(days=1, minutes=1), batch_size=1)
+        plans = []
+        for query in ctx.captured_queries:
+            if '"tasks_task"' in query['sql']:
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans.append(' '.join(row[-1] for row in cursor.fetchall()))
+        self.assertTrue(plans)
+        for plan in plans:
+            self.assertIn('task_pending_due_idx', plan)
+
+    @override_settings(TASK_SCHEDULER_CATCHUP_HOURS=72)
+    def test_api_lists_and_marks_read(self):
+        sweep(now=timezone.now() + timedelta(days=1, minutes=1))
+        data = self.client.get('/api/tasks/notifications/').json()
+        self.assertEqual(data['unread_count'], 2)
+        self.assertEqual({item['task_title'] for item in data['results']}, {'Task 2', 'Task 4'})
+
+        first = data['results'][0]['id']
+        response = self.client.post('/api/tasks/notifications/read/', {'ids': [first]}, format='json')
+        self.assertEqual(response.json(), {'updated': 1, 'unread_count': 1})
+        self.assertEqual(len(self.client.get('/api/tasks/notifications/?unread=true').json()['results']), 1)
+        self.client.post('/api/tasks/notifications/read/', {}, format='json')
+        self.assertEqual(self.client.get('/api/tasks/notifications/unread-count/').json(), {'unread_count': 0})
+
+
+class TaskEventStreamTests(TaskAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/tasks/events/?token={AccessToken.for_user(self.user)}'
+
+    def write(self, method, url, data=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(url, data, format='json')
+
+    async def next_event(self, chunks):
+        chunk = (await asyncio.wait_for(anext(chunks), 5)).decode()
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines())
+        return fields['event'], json.loads(fields['data'])
+
+    async def test_stream_delivers_task_writes(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+
+        created = await sync_to_async(self.write)('post', '/api/tasks/', {'title': 'Live'})
+        task = created.json()['task']
+        self.assertEqual(await self.next_event(chunks), ('task.created', task))
+
+        url = f"/api/tasks/{task['id']}/"
+        updated = await sync_to_async(self.write)('patch', url, {'status': 'completed'})
+        self.assertEqual(await self.next_event(chunks), ('task.updated', updated.json()['task']))
+        await sync_to_async(self.write)('delete', url)
+        self.assertEqual(await self.next_event(chunks), ('task.deleted', {'id': task['id']}))
+
+        # The ASGI handler cancels the pending read when the client disconnects
+        read = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        read.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await read
+        self.assertEqual(get_broker().subscriber_count(self.user.id), 0)
+
+    async def test_bulk_writes_and_imports_send_their_ids(self):
+        response = await self.async_client.get(self.url)
+        chunks = aiter(response.streaming_content)
+        await anext(chunks)
+
+        task = await Task.objects.filter(user=self.user).afirst()
+        bulk = await sync_to_async(self.write)('post', '/api/tasks/bulk/', {
+            'create': [{'title': 'Bulk'}], 'update': [{'id': task.id, 'priority': 'high'}]
+        })
+        created = bulk.json()['created'][0]['id']
+        self.assertEqual(await self.next_event(chunks), (
+            'tasks.changed', {'created': [created], 'updated': [task.id], 'deleted': []}
+        ))
+
+        def import_tasks():
+            with self.captureOnCommitCallbacks(execute=True):
+                return self.client.post('/api/tasks/import/', '{"title": "Imported"}',
+                                        content_type='application/x-ndjson')
+
+        await sync_to_async(import_tasks)()
+        event_type, data = await self.next_event(chunks)
+        imported = await Task.objects.aget(user=self.user, title='Imported')
+        self.assertEqual((event_type, data['created']), ('tasks.changed', [imported.id]))
+
+        read = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        read.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await read
+
+    def test_requires_token_and_asgi(self):
+        self.assertEqual(APIClient().get('/api/tasks/events/').status_code, 401)
+        # Buffered under WSGI, so EventSource is told not to retry
+        self.assertEqual(APIClient().get(self.url).status_code, 204)
+
+    @override_settings(TASK_EVENTS_MAX_PENDING=2)
+    async def test_slow_subscriber_gets_resync(self):
+        broker = LocalBroker()
+        async with broker.subscribe(self.user.id) as subscription:
+            for i in range(3):
+                broker.publish(self.user.id, {'type': 'task.deleted', 'data': {'id': i}})
+            self.assertIs(await subscription.get(timeout=1), RESYNC)
+            self.assertIsNone(await subscription.get(timeout=0.01))
@@ -1,11 +1,33 @@
+from django.conf import settings
 from django.urls import path
-from .views import TaskListCreateView, TaskDetailView, TaskSummaryView, TaskAnalyticsView, TaskCalendarView, DailySummaryView
+from . import async_views
+from .views import (
+    TaskBulkView, TaskChangesView, TaskExportView, TaskImportView, TaskCacheStatsView,
+    NotificationListView, NotificationReadView, NotificationUnreadCountView,
+)
+
+
+def read_view(async_view):
+    """The async view under TASK_ASYNC_VIEWS (for ASGI deployments), else its DRF counterpart"""
+    if getattr(settings, 'TASK_ASYNC_VIEWS', False):
+        return async_view.as_view()
+    return async_view.sync_view.as_view()
+
 
 urlpatterns = [
-    path('', TaskListCreateView.as_view(), name='task_list_create'),
-    path('summary/', TaskSummaryView.as_view(), name='task_summary'),
-    path('analytics/', TaskAnalyticsView.as_view(), name='task_analytics'),
-    path('calendar/', TaskCalendarView.as_view(), name='task_calendar'),
-    path('daily-summary/', DailySummaryView.as_view(), name='daily_summary'),
-    path('<int:pk>/', TaskDetailView.as_view(), name='task_detail'),
+    path('', read_view(async_views.AsyncTaskListView), name='task_list_create'),
+    path('bulk/', TaskBulkView.as_view(), name='task_bulk'),
+    path('changes/', TaskChangesView.as_view(), name='task_changes'),
+    path('export/', TaskExportView.as_view(), name='task_export'),
+    path('import/', TaskImportView.as_view(), name='task_import'),
+    path('events/', async_views.TaskEventStreamView.as_view(), name='task_events'),
+    path('summary/', read_view(async_views.AsyncTaskSummaryView), name='task_summary'),
+    path('analytics/', read_view(async_views.AsyncTaskAnalyticsView), name='task_analytics'),
+    path('calendar/', read_view(async_views.AsyncTaskCalendarView), name='task_calendar'),
+    path('daily-summary/', read_view(async_views.AsyncDailySummaryView), name='daily_summary'),
+    path('notifications/', NotificationListView.as_view(), name='notification_list'),
+    path('notifications/unread-count/', NotificationUnreadCountView.as_view(), name='notification_unread_count'),
+    path('notifications/read/', NotificationReadView.as_view(), name='notification_read'),
+    path('cache-stats/', TaskCacheStatsView.as_view(), name='task_cache_stats'),
+    path('<int:pk>/', read_view(async_views.AsyncTaskDetailView), name='task_detail'),
 ]
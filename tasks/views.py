@@ -1,14 +1,81 @@
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from datetime import datetime, timedelta
-from .models import Task
-from .serializers import TaskSerializer
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from datetime import date, datetime, timedelta
+from .models import Notification, Task, TaskDailyStats, TaskTombstone
+from .aggregates import aggregate_counts, aggregate_sums, daily_counts, start_of_day, status_conditions
+from .export import EXPORT_FORMATS
+from .imports import IMPORT_FORMATS, decode_lines, import_tasks
+from .conditional import task_collection_etag, task_detail_etag, task_detail_last_modified
+from .events import publish_task_event
+from .cache import bump_user_version, cache_stats, get_or_compute
+from .pagination import NotificationCursorPagination, TaskCursorPagination
+from .search import search_tasks
+from .serializers import NotificationSerializer, TaskRowSerializer, TaskSerializer
+from .stats import apply_changes, task_state
+from .sync import format_cursor, next_cursor, parse_cursor, record_deletions, tombstone_horizon
 from .permissions import IsOwner
+from accounts.preferences import get_preferences
+from accounts.serializers import UserPreferencesSerializer, UserProfileSerializer
 
 
-class TaskListCreateView(generics.ListCreateAPIView):
-    serializer_class = TaskSerializer
+class SparseFieldsetMixin:
+    """
+    Honour ?fields=a,b (or ?fields=slim) and ?exclude=a,b on GET requests:
+    only the chosen fields are serialized and only their columns fetched.
+    """
+
+    def get_fieldset(self):
+        if self.request.method != 'GET':
+            return None
+        
+        available = TaskSerializer.Meta.fields
+        fields = self.request.query_params.get('fields')
+        exclude = self.request.query_params.get('exclude')
+        if not fields and not exclude:
+            return None
+        
+        if fields == 'slim':
+            chosen = list(TaskSerializer.SLIM_FIELDS)
+        elif fields:
+            chosen = [name.strip() for name in fields.split(',') if name.strip()]
+        else:
+            chosen = list(available)
+        excluded = [name.strip() for name in exclude.split(',') if name.strip()] if exclude else []
+        
+        unknown = [name for name in chosen + excluded if name not in available]
+        if unknown:
+            raise ValidationError({
+                'fields': f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}"
+            })
+        return [name for name in available if name in chosen and name not in excluded]
+
+    def get_serializer(self, *args, **kwargs):
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            kwargs['fields'] = fieldset
+        return super().get_serializer(*args, **kwargs)
+
+    def apply_fieldset(self, queryset):
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return queryset
+        # user is always loaded for the ownership check
+        return queryset.only('id', 'user', *fieldset)
+
+
+class TaskFilterMixin:
+    """Filtering, search and ordering of the task list, shared with the export"""
+    # Whether ?q= left out matches beyond TASK_SEARCH_LIMIT
+    search_truncated = False
 
     def get_queryset(self):
         queryset = Task.objects.filter(user=self.request.user)
@@ -40,10 +107,52 @@ class TaskListCreateView(generics.ListCreateAPIView):
             next_week = today + timedelta(days=7)
             queryset = queryset.filter(due_date__gte=today, due_date__lte=next_week, status='pending')
 
-        return queryset.order_by('-created_at')
+        # Full-text search over title and description, best matches first
+        q = self.request.query_params.get('q')
+        if q:
+            queryset, self.search_truncated = search_tasks(queryset, q, self.request.user)
+            return self.apply_fieldset(queryset)
+
+        return self.apply_fieldset(queryset.order_by('-created_at', '-id'))
+
+    def search_headers(self):
+        """Tell searching clients when results were cut at the limit"""
+        if 'q' not in self.request.query_params:
+            return {}
+        return {'X-Search-Truncated': 'true' if self.search_truncated else 'false'}
+
+
+@method_decorator(condition(etag_func=task_collection_etag), name='get')
+class TaskListCreateView(SparseFieldsetMixin, TaskFilterMixin, generics.ListCreateAPIView):
+    serializer_class = TaskSerializer
+    pagination_class = TaskCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        """
+        Serialize straight from values() rows; output is identical to
+        TaskSerializer's
+        """
+        # Pages are ordered by creation time, which would drop the ranking
+        if request.query_params.get('q') and any(
+            param in request.query_params for param in ('cursor', 'page_size')
+        ):
+            return Response({
+                'error': 'Invalid search',
+                'details': 'Search results are ranked and cannot be paginated; drop cursor and page_size'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        row_serializer = TaskRowSerializer(self.get_fieldset())
+        # The cursor paginator also reads the ordering columns from each row
+        queryset = self.get_queryset().values(*{*row_serializer.fields, 'created_at', 'id'})
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page))
+        return Response(row_serializer.serialize(queryset), headers=self.search_headers())
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        task = serializer.save(user=self.request.user)
+        publish_task_event(task.user_id, 'task.created', lambda: TaskSerializer(task).data)
     
     def create(self, request, *args, **kwargs):
         """
@@ -66,12 +175,24 @@ class TaskListCreateView(generics.ListCreateAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+@method_decorator(condition(etag_func=task_detail_etag, last_modified_func=task_detail_last_modified), name='get')
+class TaskDetailView(SparseFieldsetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TaskSerializer
     permission_classes = [IsOwner]
 
     def get_queryset(self):
-        return Task.objects.filter(user=self.request.user)
+        return self.apply_fieldset(Task.objects.filter(user=self.request.user))
+    
+    def perform_update(self, serializer):
+        task = serializer.save()
+        publish_task_event(task.user_id, 'task.updated', lambda: TaskSerializer(task).data)
+    
+    def perform_destroy(self, instance):
+        task_id = instance.id
+        with transaction.atomic():
+            instance.delete()
+            record_deletions(self.request.user, [task_id])
+            publish_task_event(self.request.user.id, 'task.deleted', {'id': task_id})
     
     def update(self, request, *args, **kwargs):
         """
@@ -96,26 +217,269 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TaskSummaryView(generics.GenericAPIView):
+class TaskExportView(SparseFieldsetMixin, TaskFilterMixin, generics.GenericAPIView):
+    """
+    Stream all of the user's tasks as ?format=ndjson (default), csv or json.
+    Accepts the same filters and ?fields= as the task list; rows are read
+    with a chunked iterator so memory use does not grow with the task count.
+    """
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= selects the export format here, not a DRF renderer
+        return super().perform_content_negotiation(request, force=True)
 
     def get(self, request):
-        from datetime import datetime, timedelta
+        export_format = request.query_params.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({
+                'error': 'Invalid export format',
+                'details': f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
         
+        row_serializer = TaskRowSerializer(self.get_fieldset())
+        rows = self.get_queryset().values(*row_serializer.fields).iterator(
+            chunk_size=getattr(settings, 'TASK_EXPORT_CHUNK_SIZE', 2000)
+        )
+        
+        write_lines, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            write_lines(rows, row_serializer), content_type=content_type, headers=self.search_headers()
+        )
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+
+
+class TaskBulkView(generics.GenericAPIView):
+    """
+    Create, partially update and delete many tasks in one request.
+
+    Body: {"create": [{...}], "update": [{"id": 1, ...}], "delete": [2, 3]}
+    Every item is validated first; if any item fails nothing is written and
+    the errors are reported per item, in request order.
+    """
+    serializer_class = TaskSerializer
+    MAX_ITEMS = 500
+
+    @staticmethod
+    def item_id(value):
+        """``value`` if it can be a task id, else None; clients may send anything"""
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({
+                'error': 'Bulk operation failed',
+                'details': 'Expected an object'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        creates = request.data.get('create', [])
+        updates = request.data.get('update', [])
+        deletes = request.data.get('delete', [])
+
+        if not all(isinstance(items, list) for items in (creates, updates, deletes)):
+            return Response({
+                'error': 'Bulk operation failed',
+                'details': 'create, update and delete must be lists'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(creates) + len(updates) + len(deletes) > self.MAX_ITEMS:
+            return Response({
+                'error': 'Bulk operation failed',
+                'details': f'A bulk request cannot contain more than {self.MAX_ITEMS} items'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
         tasks = Task.objects.filter(user=request.user)
+        ids = [self.item_id(item.get('id')) for item in updates if isinstance(item, dict)]
+        ids += [self.item_id(pk) for pk in deletes]
+        existing = tasks.in_bulk([pk for pk in ids if pk is not None])
+
+        # Validate creates
+        create_serializers = []
+        create_errors = []
+        for item in creates:
+            serializer = self.get_serializer(data=item)
+            serializer.is_valid()
+            create_serializers.append(serializer)
+            create_errors.append(serializer.errors)
+
+        # Validate updates one by one against their instance
+        update_serializers = []
+        update_errors = []
+        for item in updates:
+            instance = existing.get(self.item_id(item.get('id'))) if isinstance(item, dict) else None
+            if instance is None:
+                update_errors.append({'id': 'Task not found.'})
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            serializer.is_valid()
+            update_serializers.append(serializer)
+            update_errors.append(serializer.errors)
+
+        # Validate deletes
+        delete_errors = [{} if self.item_id(pk) in existing else {'id': 'Task not found.'} for pk in deletes]
+
+        if any(create_errors) or any(update_errors) or any(delete_errors):
+            return Response({
+                'error': 'Bulk operation failed',
+                'details': {
+                    'create': create_errors,
+                    'update': update_errors,
+                    'delete': delete_errors
+                }
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        # Each task is deleted, reported and tombstoned once however often it was listed
+        deletes = list(dict.fromkeys(deletes))
+        now = timezone.now()
+        updated = []
+        update_fields = {'updated_at'}
+        stats_changes = []
+        for serializer in update_serializers:
+            previous = task_state(serializer.instance)
+            for field, value in serializer.validated_data.items():
+                setattr(serializer.instance, field, value)
+                update_fields.add(field)
+            # bulk_update() bypasses auto_now
+            serializer.instance.updated_at = now
+            updated.append(serializer.instance)
+            stats_changes.append((previous, task_state(serializer.instance)))
+
+        with transaction.atomic():
+            created = Task.objects.bulk_create([
+                Task(user=request.user, **serializer.validated_data) for serializer in create_serializers
+            ])
+            if updated:
+                Task.objects.bulk_update(updated, sorted(update_fields))
+            if deletes:
+                tasks.filter(id__in=deletes).delete()
+                record_deletions(request.user, deletes)
+            # bulk_create()/bulk_update() send no model signals
+            apply_changes(stats_changes + [(None, task_state(task)) for task in created])
+            transaction.on_commit(lambda: bump_user_version(request.user.id))
+            # One event for the whole request rather than one per task
+            publish_task_event(request.user.id, 'tasks.changed', {
+                'created': [task.id for task in created],
+                'updated': [task.id for task in updated],
+                'deleted': deletes
+            })
+
+        return Response({
+            'message': 'Bulk operation completed successfully',
+            'created': self.get_serializer(created, many=True).data,
+            'updated': self.get_serializer(updated, many=True).data,
+            'deleted': deletes
+        })
+
+
+class TaskImportView(generics.GenericAPIView):
+    """
+    Import tasks from NDJSON or CSV, either uploaded as the "file" field of a
+    multipart form or sent as the raw body with an application/x-ndjson or
+    text/csv content type. The input is read line by line and inserted in
+    batches; valid rows are kept even when others fail.
+    """
+    CONTENT_TYPES = {'application/x-ndjson': 'ndjson', 'text/csv': 'csv'}
+
+    def post(self, request):
+        if request.content_type.startswith('multipart/form-data'):
+            upload = request.FILES.get('file')
+            if upload is None:
+                return Response({
+                    'error': 'Import failed',
+                    'details': 'Upload the tasks as the "file" field'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            import_format = request.data.get('format') or upload.name.rpartition('.')[2].lower()
+            lines = upload
+        else:
+            import_format = self.CONTENT_TYPES.get(request.content_type.split(';')[0].strip())
+            lines = request.stream or []
         
+        if import_format not in IMPORT_FORMATS:
+            return Response({
+                'error': 'Import failed',
+                'details': f"format must be one of: {', '.join(IMPORT_FORMATS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        summary = import_tasks(request.user, IMPORT_FORMATS[import_format](decode_lines(lines)))
+        if 'stopped' in summary:
+            # The rows before the unreadable line were imported
+            return Response({
+                'error': 'Import stopped',
+                'details': f"Line {summary['stopped']['line']}: {summary['stopped']['error']}",
+                **summary
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'message': 'Import completed', **summary})
+
+
+class TaskChangesView(generics.GenericAPIView):
+    serializer_class = TaskSerializer
+
+    def get(self, request):
+        """
+        Tasks created or updated since ?since=<cursor> plus the ids of tasks
+        deleted since then. Without a cursor, or with one older than the
+        tombstone retention period, every task is returned and "full" is true
+        so the client replaces its copy. Pass the returned cursor as ?since=
+        on the next call; the latest changes are repeated, so apply them by id.
+        """
+        since_param = request.query_params.get('since')
+        since = parse_cursor(since_param)
+        if since_param and since is None:
+            return Response({
+                'error': 'Invalid cursor',
+                'details': 'since must be a cursor returned by this endpoint'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Taken before reading, and behind it, so writes committing during
+        # or shortly after this request are sent next time
+        cursor = next_cursor()
+        tasks = Task.objects.filter(user=request.user)
+        
+        full = since is None or since < tombstone_horizon()
+        if full:
+            deleted = []
+        else:
+            tasks = tasks.filter(updated_at__gte=since)
+            deleted = list(
+                TaskTombstone.objects.filter(user=request.user, deleted_at__gte=since)
+                .values_list('task_id', flat=True)
+            )
+        
+        return Response({
+            'cursor': format_cursor(cursor),
+            'full': full,
+            'changed': self.get_serializer(tasks.order_by('updated_at', 'id'), many=True).data,
+            'deleted': deleted
+        })
+
+
+class TaskSummaryView(generics.GenericAPIView):
+
+    def get(self, request):
+        return Response(get_or_compute(
+            request.user.id, 'summary', request.query_params.dict(),
+            lambda: self.summarize(request)
+        ))
+
+    def summarize(self, request):
+        """Task counters and completion rate for the requested period"""
+        now = timezone.now()
+        conditions, period = self.period_conditions(request.query_params, now)
+        counts = aggregate_counts(Task.objects.filter(user=request.user), **conditions)
+        return self.build_summary(counts, period)
+
+    @staticmethod
+    def period_conditions(params, now):
+        """
+        COUNT conditions for the overall and the period counters, all fetched
+        in a single query, plus the labels of the requested period
+        """
         # Get filter parameters
-        period = request.query_params.get('period', 'total')  # total, week, month
-        year = request.query_params.get('year')
-        week = request.query_params.get('week')
-        month = request.query_params.get('month')
-
-        total = tasks.count()
-        completed = tasks.filter(status='completed').count()
-        pending = tasks.filter(status='pending').count()
-        overdue = tasks.filter(
-            due_date__lt=timezone.now(),
-            status='pending'
-        ).count()
+        period = params.get('period', 'total')  # total, week, month
+        year = params.get('year')
+        week = params.get('week')
+        month = params.get('month')
         
         # Calculate completion rate based on period
         if period == 'week' and year and week:
@@ -135,11 +499,10 @@ class TaskSummaryView(generics.GenericAPIView):
             end_of_week = timezone.make_aware(end_of_week) if timezone.is_naive(end_of_week) else end_of_week
             
             # Only count tasks with due dates in this week that have passed
-            now = timezone.now()
             end_date = min(end_of_week, now)
             
             # Filter tasks for this week - only tasks with due dates that have passed
-            tasks_in_period = tasks.filter(
+            period_filter = Q(
                 due_date__isnull=False,
                 due_date__gte=start_of_week,
                 due_date__lte=end_date
@@ -164,11 +527,10 @@ class TaskSummaryView(generics.GenericAPIView):
             end_of_month = timezone.make_aware(end_of_month) if timezone.is_naive(end_of_month) else end_of_month
             
             # Only count tasks with due dates in this month that have passed
-            now = timezone.now()
             end_date = min(end_of_month, now)
             
             # Filter tasks for this month - only tasks with due dates that have passed
-            tasks_in_period = tasks.filter(
+            period_filter = Q(
                 due_date__isnull=False,
                 due_date__gte=start_of_month,
                 due_date__lte=end_date
@@ -181,276 +543,449 @@ class TaskSummaryView(generics.GenericAPIView):
             
         else:
             # Total (all time) - tasks that have reached their due date
-            tasks_in_period = tasks.filter(
+            period_filter = Q(
                 due_date__isnull=False,
-                due_date__lte=timezone.now()
+                due_date__lte=now
             )
             period_label = "All Time"
             date_range = "Total completion rate"
         
-        # Calculate completion rate for the period
-        total_due = tasks_in_period.count()
-        completed_due = tasks_in_period.filter(status='completed').count()
-        pending_due = tasks_in_period.filter(status='pending').count()
+        conditions = {
+            **status_conditions(now),
+            'total_due': period_filter,
+            'completed_due': period_filter & Q(status='completed'),
+            'pending_due': period_filter & Q(status='pending'),
+        }
+        return conditions, {'period': period, 'period_label': period_label, 'date_range': date_range}
+
+    @staticmethod
+    def build_summary(counts, period):
+        total_due = counts['total_due']
+        completed_due = counts['completed_due']
         
         completion_rate = 0
         if total_due > 0:
             completion_rate = round((completed_due / total_due) * 100, 1)
 
-        return Response({
-            "total_tasks": total,
-            "completed_tasks": completed,
-            "pending_tasks": pending,
-            "overdue_tasks": overdue,
+        return {
+            "total_tasks": counts['total'],
+            "completed_tasks": counts['completed'],
+            "pending_tasks": counts['pending'],
+            "overdue_tasks": counts['overdue'],
             "completion_rate": completion_rate,
             "tasks_due": total_due,
             "completed_due": completed_due,
-            "pending_due": pending_due,
-            "period": period,
-            "period_label": period_label,
-            "date_range": date_range
-        })
-
-
-class TaskAnalyticsView(generics.GenericAPIView):
-    def get(self, request):
-        tasks = Task.objects.filter(user=request.user)
-
-        # Weekly performance (last 7 days)
-        today = timezone.now().date()
-        weekly_data = []
-        for i in range(6, -1, -1):
-            date = today - timedelta(days=i)
-            completed = tasks.filter(
-                status='completed',
-                updated_at__date=date
-            ).count()
-            created = tasks.filter(created_at__date=date).count()
-            weekly_data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'completed': completed,
-                'created': created
-            })
-
-        # Priority distribution
-        priority_dist = {
-            'high': tasks.filter(priority='high').count(),
-            'medium': tasks.filter(priority='medium').count(),
-            'low': tasks.filter(priority='low').count()
+            "pending_due": counts['pending_due'],
+            **period
         }
 
-        # Status distribution
-        status_dist = {
-            'completed': tasks.filter(status='completed').count(),
-            'pending': tasks.filter(status='pending').count()
-        }
-
-        # Completion rate (last 30 days)
-        thirty_days_ago = today - timedelta(days=30)
-        recent_tasks = tasks.filter(created_at__date__gte=thirty_days_ago)
-        total_recent = recent_tasks.count()
-        completed_recent = recent_tasks.filter(status='completed').count()
-        completion_rate = (completed_recent / total_recent * 100) if total_recent > 0 else 0
-
-        # Productivity score (0-100)
-        overdue = tasks.filter(due_date__lt=timezone.now(), status='pending').count()
-        total = tasks.count()
-        productivity_score = max(0, 100 - (overdue * 10)) if total > 0 else 0
-
-        return Response({
-            'weekly_performance': weekly_data,
-            'priority_distribution': priority_dist,
-            'status_distribution': status_dist,
-            'completion_rate': round(completion_rate, 1),
-            'productivity_score': min(100, productivity_score)
-        })
 
+class TaskAnalyticsView(generics.GenericAPIView):
+    ALLOWED_WINDOWS = (7, 30, 90)
 
-class TaskCalendarView(generics.GenericAPIView):
     def get(self, request):
-        # Get year and month from query params, default to current
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
-
-        # Get first and last day of the month
-        first_day = datetime(year, month, 1)
-        if month == 12:
-            last_day = datetime(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            last_day = datetime(year, month + 1, 1) - timedelta(days=1)
-
-        # Get all tasks for the user in this month
-        tasks = Task.objects.filter(
-            user=request.user,
-            due_date__gte=first_day,
-            due_date__lte=last_day
-        ).order_by('due_date')
-
-        # Group tasks by date
-        tasks_by_date = {}
-        for task in tasks:
-            date_key = task.due_date.strftime('%Y-%m-%d')
-            if date_key not in tasks_by_date:
-                tasks_by_date[date_key] = []
-
-            tasks_by_date[date_key].append({
-                'id': task.id,
-                'title': task.title,
-                'priority': task.priority,
-                'status': task.status,
-                'due_date': task.due_date.isoformat()
-            })
-
-        return Response({
-            'year': year,
-            'month': month,
-            'tasks_by_date': tasks_by_date
-        })
-
+        days = self.parse_window(request.query_params)
+        if days is None:
+            return Response(self.window_error(), status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(get_or_compute(
+            request.user.id, 'analytics', {'days': days},
+            lambda: self.analyze(request, days)
+        ))
+
+    @classmethod
+    def parse_window(cls, params):
+        """Performance window in days (7, 30 or 90), None if invalid"""
+        try:
+            days = int(params.get('days', 7))
+        except ValueError:
+            return None
+        return days if days in cls.ALLOWED_WINDOWS else None
+
+    @classmethod
+    def window_error(cls):
+        return {
+            'error': 'Invalid window',
+            'details': f"days must be one of: {', '.join(str(d) for d in cls.ALLOWED_WINDOWS)}"
+        }
 
+    def analyze(self, request, days):
+        """Performance series, distributions and scores over the last ``days`` days"""
+        now = timezone.now()
+        rows, (stats, columns), overdue = self.analytics_queries(request.user, days, now)
+        return self.build_analytics(days, now, list(rows), aggregate_sums(stats, **columns), overdue.count())
 
-class TaskAnalyticsView(generics.GenericAPIView):
-    def get(self, request):
-        tasks = Task.objects.filter(user=request.user)
-        
-        # Weekly performance (last 7 days)
-        today = timezone.now().date()
+    @staticmethod
+    def analytics_queries(user, days, now):
+        """
+        The three independent queries behind the analytics: rollup rows in
+        the window, ``aggregate_sums`` arguments for the totals and the
+        overdue tasks
+        """
+        stats = TaskDailyStats.objects.filter(user=user)
+        today = timezone.localdate(now)
+        window_start = today - timedelta(days=days - 1)
+        rows = stats.filter(date__gte=window_start).values('date', 'created', 'completed')
+
+        # Distributions and 30-day completion from the rollup totals
+        recent = Q(date__gte=today - timedelta(days=30))
+        columns = {
+            'total': 'created',
+            'completed': 'created_completed',
+            'high': 'high',
+            'medium': 'medium',
+            'low': 'low',
+            'total_recent': ('created', recent),
+            'completed_recent': ('created_completed', recent),
+        }
+        overdue = Task.objects.filter(user=user, status='pending', due_date__lt=now)
+        return rows, (stats, columns), overdue
+
+    @staticmethod
+    def build_analytics(days, now, rows, counts, overdue):
+        # Daily performance straight from the rollup rows in the window
+        today = timezone.localdate(now)
+        rows = {row['date']: row for row in rows}
+        counts['overdue'] = overdue
         weekly_data = []
-        for i in range(6, -1, -1):
-            date = today - timedelta(days=i)
-            completed = tasks.filter(
-                status='completed',
-                updated_at__date=date
-            ).count()
-            created = tasks.filter(created_at__date=date).count()
+        for i in range(days - 1, -1, -1):
+            day = today - timedelta(days=i)
+            row = rows.get(day, {})
             weekly_data.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'completed': completed,
-                'created': created
+                'date': day.strftime('%Y-%m-%d'),
+                'completed': row.get('completed', 0),
+                'created': row.get('created', 0)
             })
         
         # Priority distribution
         priority_dist = {
-            'high': tasks.filter(priority='high').count(),
-            'medium': tasks.filter(priority='medium').count(),
-            'low': tasks.filter(priority='low').count()
+            'high': counts['high'],
+            'medium': counts['medium'],
+            'low': counts['low']
         }
         
         # Status distribution
         status_dist = {
-            'completed': tasks.filter(status='completed').count(),
-            'pending': tasks.filter(status='pending').count()
+            'completed': counts['completed'],
+            'pending': counts['total'] - counts['completed']
         }
         
         # Completion rate (last 30 days)
-        thirty_days_ago = today - timedelta(days=30)
-        recent_tasks = tasks.filter(created_at__date__gte=thirty_days_ago)
-        total_recent = recent_tasks.count()
-        completed_recent = recent_tasks.filter(status='completed').count()
-        completion_rate = (completed_recent / total_recent * 100) if total_recent > 0 else 0
+        total_recent = counts['total_recent']
+        completion_rate = (counts['completed_recent'] / total_recent * 100) if total_recent > 0 else 0
         
         # Productivity score (0-100)
-        overdue = tasks.filter(due_date__lt=timezone.now(), status='pending').count()
-        total = tasks.count()
-        productivity_score = max(0, 100 - (overdue * 10)) if total > 0 else 0
+        productivity_score = max(0, 100 - (counts['overdue'] * 10)) if counts['total'] > 0 else 0
         
-        return Response({
+        return {
+            'days': days,
             'weekly_performance': weekly_data,
             'priority_distribution': priority_dist,
             'status_distribution': status_dist,
             'completion_rate': round(completion_rate, 1),
             'productivity_score': min(100, productivity_score)
-        })
+        }
 
 
+@method_decorator(condition(etag_func=task_collection_etag), name='get')
 class TaskCalendarView(generics.GenericAPIView):
+    MAX_RANGE_DAYS = 366
+
     def get(self, request):
-        # Get year and month from query params, default to current
-        year = int(request.query_params.get('year', timezone.now().year))
-        month = int(request.query_params.get('month', timezone.now().month))
-        
-        # Get first and last day of the month
-        first_day = datetime(year, month, 1)
-        if month == 12:
-            last_day = datetime(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            last_day = datetime(year, month + 1, 1) - timedelta(days=1)
+        """
+        Tasks due in a month (?year=&month=, default current) or in an
+        arbitrary range (?start=YYYY-MM-DD&end=YYYY-MM-DD, end exclusive).
+        With ?counts=true only the number of tasks per day is returned.
+        """
+        try:
+            first_day, next_day, period = self.parse_range(request.query_params)
+        except ValueError as e:
+            return Response({
+                'error': 'Invalid date range',
+                'details': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        tasks = self.range_tasks(request.user, first_day, next_day)
+        if request.query_params.get('counts') == 'true':
+            return Response(self.build_counts(period, daily_counts(tasks, 'due_date', first_day)))
+        return Response(self.build_tasks_by_date(period, self.task_rows(tasks)))
+
+    @classmethod
+    def parse_range(cls, params):
+        """``(first_day, next_day, period)`` for the query; ValueError explains bad input"""
+        start = params.get('start')
+        end = params.get('end')
         
-        # Get all tasks for the user in this month
-        tasks = Task.objects.filter(
-            user=request.user,
-            due_date__gte=first_day,
-            due_date__lte=last_day
-        ).order_by('due_date')
+        try:
+            if start or end:
+                first_day = date.fromisoformat(start)
+                next_day = date.fromisoformat(end)
+                period = {'start': first_day.isoformat(), 'end': next_day.isoformat()}
+            else:
+                # Get year and month from query params, default to current
+                today = timezone.localdate()
+                year = int(params.get('year', today.year))
+                month = int(params.get('month', today.month))
+                first_day = date(year, month, 1)
+                next_day = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+                period = {'year': year, 'month': month}
+        except (TypeError, ValueError):
+            raise ValueError('Use ?year=&month= or ?start=YYYY-MM-DD&end=YYYY-MM-DD')
         
+        if not 0 < (next_day - first_day).days <= cls.MAX_RANGE_DAYS:
+            raise ValueError(f'end must be after start and at most {cls.MAX_RANGE_DAYS} days later')
+        return first_day, next_day, period
+
+    @staticmethod
+    def range_tasks(user, first_day, next_day):
+        # Half-open range so tasks due at any time on the last day are included
+        return Task.objects.filter(
+            user=user,
+            due_date__gte=start_of_day(first_day),
+            due_date__lt=start_of_day(next_day)
+        )
+
+    @staticmethod
+    def task_rows(tasks):
+        return tasks.order_by('due_date', 'id').values_list('id', 'title', 'priority', 'status', 'due_date')
+
+    @staticmethod
+    def build_counts(period, counts):
+        return {
+            **period,
+            'counts_by_date': {day.strftime('%Y-%m-%d'): count for day, count in sorted(counts.items())}
+        }
+
+    @staticmethod
+    def build_tasks_by_date(period, rows):
         # Group tasks by date
         tasks_by_date = {}
-        for task in tasks:
-            date_key = task.due_date.strftime('%Y-%m-%d')
-            if date_key not in tasks_by_date:
-                tasks_by_date[date_key] = []
-            
-            tasks_by_date[date_key].append({
-                'id': task.id,
-                'title': task.title,
-                'priority': task.priority,
-                'status': task.status,
-                'due_date': task.due_date.isoformat()
+        for task_id, title, priority, task_status, due_date in rows:
+            date_key = timezone.localtime(due_date).strftime('%Y-%m-%d')
+            tasks_by_date.setdefault(date_key, []).append({
+                'id': task_id,
+                'title': title,
+                'priority': priority,
+                'status': task_status,
+                'due_date': due_date.isoformat()
             })
         
-        return Response({
-            'year': year,
-            'month': month,
+        return {
+            **period,
             'tasks_by_date': tasks_by_date
-        })
+        }
 
 
 class DailySummaryView(generics.GenericAPIView):
     def get(self, request):
         """Get daily summary data for dashboard display"""
-        tasks = Task.objects.filter(user=request.user)
-        
-        # Get today's date
-        today = timezone.now().date()
-        tomorrow = today + timedelta(days=1)
-        
-        # Tasks due today
-        tasks_today = tasks.filter(
-            due_date__date=today,
-            status='pending'
-        ).values('id', 'title', 'priority', 'due_date')
-        
-        # Tasks due tomorrow
-        tasks_tomorrow = tasks.filter(
-            due_date__date=tomorrow,
-            status='pending'
-        ).values('id', 'title', 'priority', 'due_date')
-        
-        # Overdue tasks
-        overdue_tasks = tasks.filter(
-            due_date__lt=timezone.now(),
-            status='pending'
-        ).values('id', 'title', 'priority', 'due_date')
-        
-        # Tasks completed today
-        completed_today = tasks.filter(
-            updated_at__date=today,
-            status='completed'
-        ).count()
-        
-        # Total pending tasks
-        total_pending = tasks.filter(status='pending').count()
-        
-        return Response({
+        return Response(get_or_compute(
+            request.user.id, 'daily-summary', {},
+            lambda: self.summarize_day(request)
+        ))
+
+    def summarize_day(self, request):
+        """Today's, tomorrow's and overdue pending tasks"""
+        today = timezone.localdate()
+        queries = self.daily_queries(request.user, today)
+        counted, conditions = queries['counts']
+        return self.build_daily_summary(
+            today,
+            list(queries['tasks_today']),
+            list(queries['tasks_tomorrow']),
+            list(queries['overdue_tasks']),
+            aggregate_counts(counted, **conditions),
+            queries['completed_today'].first() or 0,
+        )
+
+    @staticmethod
+    def daily_queries(user, today):
+        """The independent queries behind the daily summary, by name"""
+        tasks = Task.objects.filter(user=user)
+        pending = tasks.filter(status='pending')
+        columns = ('id', 'title', 'priority', 'due_date')
+        return {
+            # Tasks due today and tomorrow
+            'tasks_today': pending.filter(due_date__date=today).values(*columns),
+            'tasks_tomorrow': pending.filter(due_date__date=today + timedelta(days=1)).values(*columns),
+            # Overdue tasks, limited to 5
+            'overdue_tasks': pending.filter(due_date__lt=timezone.now()).values(*columns)[:5],
+            # Overdue and total pending counts
+            'counts': (pending, {'overdue': Q(due_date__lt=timezone.now()), 'total_pending': None}),
+            # Tasks completed today
+            'completed_today': TaskDailyStats.objects.filter(
+                user=user,
+                date=today
+            ).values_list('completed', flat=True),
+        }
+
+    @staticmethod
+    def build_daily_summary(today, tasks_today, tasks_tomorrow, overdue_tasks, counts, completed_today):
+        return {
             'date': today.strftime('%B %d, %Y'),
             'summary': {
                 'completed_today': completed_today,
-                'tasks_due_today': tasks_today.count(),
-                'tasks_due_tomorrow': tasks_tomorrow.count(),
-                'overdue_tasks': overdue_tasks.count(),
-                'total_pending': total_pending
+                'tasks_due_today': len(tasks_today),
+                'tasks_due_tomorrow': len(tasks_tomorrow),
+                'overdue_tasks': counts['overdue'],
+                'total_pending': counts['total_pending']
             },
-            'tasks_today': list(tasks_today),
-            'tasks_tomorrow': list(tasks_tomorrow),
-            'overdue_tasks': list(overdue_tasks[:5])  # Limit to 5
+            'tasks_today': tasks_today,
+            'tasks_tomorrow': tasks_tomorrow,
+            'overdue_tasks': overdue_tasks
+        }
+
+
+class DashboardView(generics.GenericAPIView):
+    """
+    Everything the dashboard shows on first load in one response.
+
+    ?include=a,b picks sections (default all); the summary accepts the same
+    period parameters as /api/tasks/summary/. The counters of the summary
+    and the daily summary come from one aggregate pass, and the today,
+    tomorrow and upcoming lists from one query over the pending tasks.
+    """
+    SECTIONS = ('profile', 'preferences', 'summary', 'daily_summary', 'tasks')
+    TASK_SECTIONS = ('summary', 'daily_summary', 'tasks')
+
+    def get(self, request):
+        include = request.query_params.get('include')
+        sections = [name.strip() for name in include.split(',') if name.strip()] if include else self.SECTIONS
+        unknown = [name for name in sections if name not in self.SECTIONS]
+        if unknown:
+            return Response({
+                'error': 'Invalid sections',
+                'details': f"Unknown section(s): {', '.join(unknown)}. Available: {', '.join(self.SECTIONS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = {}
+        if 'profile' in sections or 'preferences' in sections:
+            preferences = get_preferences(request.user)
+            context = {'request': request}
+            data['profile'] = UserProfileSerializer(request.user, context=context).data
+            data['preferences'] = UserPreferencesSerializer(preferences, context=context).data
+        
+        task_sections = [name for name in self.TASK_SECTIONS if name in sections]
+        if task_sections:
+            params = {**request.query_params.dict(), 'include': ','.join(task_sections)}
+            data.update(get_or_compute(
+                request.user.id, 'dashboard', params,
+                lambda: self.summarize_tasks(request, task_sections)
+            ))
+        
+        return Response({name: data[name] for name in self.SECTIONS if name in sections})
+
+    def summarize_tasks(self, request, sections):
+        tasks = Task.objects.filter(user=request.user)
+        now = timezone.now()
+        today = timezone.localdate(now)
+        result = {}
+        
+        # One aggregate pass for the summary and the daily summary counters
+        conditions, period = TaskSummaryView.period_conditions(request.query_params, now)
+        counts = aggregate_counts(tasks, **conditions)
+        if 'summary' in sections:
+            result['summary'] = TaskSummaryView.build_summary(counts, period)
+        
+        if 'daily_summary' in sections or 'tasks' in sections:
+            pending = tasks.filter(status='pending').order_by('-created_at', '-id')
+            fields = TaskSerializer.SLIM_FIELDS
+            upcoming_end = now + timedelta(days=7)
+            # Pending tasks due from the start of today to the end of the
+            # upcoming window, which covers tomorrow too
+            rows = list(pending.filter(
+                due_date__gte=start_of_day(today),
+                due_date__lte=upcoming_end
+            ).values(*fields))
+            overdue = list(pending.filter(due_date__lt=now).values(*fields)[:5])
+            
+            due_on = {}
+            for row in rows:
+                due_on.setdefault(timezone.localdate(row['due_date']), []).append(row)
+            tasks_today = due_on.get(today, [])
+            upcoming = [row for row in rows if now <= row['due_date'] <= upcoming_end]
+            
+            if 'daily_summary' in sections:
+                columns = ('id', 'title', 'priority', 'due_date')
+                completed_today = TaskDailyStats.objects.filter(
+                    user=request.user,
+                    date=today
+                ).values_list('completed', flat=True).first() or 0
+                result['daily_summary'] = DailySummaryView.build_daily_summary(
+                    today,
+                    [{name: row[name] for name in columns} for row in tasks_today],
+                    [{name: row[name] for name in columns} for row in due_on.get(today + timedelta(days=1), [])],
+                    [{name: row[name] for name in columns} for row in overdue],
+                    {'overdue': counts['overdue'], 'total_pending': counts['pending']},
+                    completed_today,
+                )
+            
+            if 'tasks' in sections:
+                row_serializer = TaskRowSerializer(fields)
+                result['tasks'] = {
+                    'today': row_serializer.serialize(tasks_today),
+                    'overdue': row_serializer.serialize(overdue),
+                    'upcoming': row_serializer.serialize(upcoming),
+                }
+        
+        return result
+
+
+class NotificationListView(generics.ListAPIView):
+    """
+    The user's notifications, newest first (?unread=true for unread ones
+    only), cursor paginated, with the number of unread notifications
+    """
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        if self.request.query_params.get('unread') == 'true':
+            queryset = queryset.filter(read_at__isnull=True)
+        return queryset.select_related('task').only(
+            'id', 'task', 'task__title', 'kind', 'due_date', 'created_at', 'read_at'
+        )
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        response.data['unread_count'] = unread_notifications(request.user)
+        return response
+
+
+class NotificationUnreadCountView(generics.GenericAPIView):
+    def get(self, request):
+        """Number of unread notifications, cheap enough to poll"""
+        return Response({'unread_count': unread_notifications(request.user)})
+
+
+class NotificationReadView(generics.GenericAPIView):
+    def post(self, request):
+        """Mark the notifications listed in "ids", or all of them, as read"""
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        unread = Notification.objects.filter(user=request.user, read_at__isnull=True)
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+                return Response({
+                    'error': 'Invalid notification ids',
+                    'details': 'ids must be a list of notification ids'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            unread = unread.filter(id__in=ids)
+        
+        updated = unread.update(read_at=timezone.now())
+        return Response({
+            'updated': updated,
+            'unread_count': unread_notifications(request.user)
         })
+
+
+def unread_notifications(user):
+    return Notification.objects.filter(user=user, read_at__isnull=True).count()
+
+
+class TaskCacheStatsView(generics.GenericAPIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Hit/miss counters of the summary cache in this process"""
+        return Response(cache_stats())